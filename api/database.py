@@ -1,6 +1,10 @@
-from sqlalchemy import create_engine
+import json
+
+import numpy as np
+from sqlalchemy import bindparam, create_engine, event, inspect, select, text, update
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
 import os
 
 # Local SQLite database
@@ -16,8 +20,36 @@ engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers and the writer proceed concurrently and, with
+    # synchronous=NORMAL, only fsyncs at checkpoints instead of every commit.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+# Trigram full-text index over tag names, kept in sync by triggers. Trigram
+# matching keeps the substring semantics of the old LIKE '%kw%' lookups.
+TAG_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tag_fts USING fts5("
+    "name, content='tags', content_rowid='rowid', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS tags_fts_ai AFTER INSERT ON tags BEGIN "
+    "INSERT INTO tag_fts(rowid, name) VALUES (new.rowid, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS tags_fts_ad AFTER DELETE ON tags BEGIN "
+    "INSERT INTO tag_fts(tag_fts, rowid, name) VALUES ('delete', old.rowid, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS tags_fts_au AFTER UPDATE ON tags BEGIN "
+    "INSERT INTO tag_fts(tag_fts, rowid, name) VALUES ('delete', old.rowid, old.name); "
+    "INSERT INTO tag_fts(rowid, name) VALUES (new.rowid, new.name); END",
+]
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# One reusable Session per thread for short synchronous reads. close() hands the
+# connection back to the pool but keeps the Session registered for the thread.
+ScopedSession = scoped_session(SessionLocal)
+
 Base = declarative_base()
 
 def get_db():
@@ -31,3 +63,82 @@ def init_db():
     """Creates tables if they don't exist."""
     from api import models
     Base.metadata.create_all(bind=engine)
+    # The link upsert's unique index can't be built over duplicate links left
+    # by the old select-then-insert path
+    existing_indexes = {i["name"] for i in inspect(engine).get_indexes("item_links")}
+    if "uq_links_source_target_type" not in existing_indexes:
+        with engine.begin() as conn:
+            conn.execute(text(
+                "DELETE FROM item_links WHERE rowid NOT IN ("
+                "SELECT MAX(rowid) FROM item_links GROUP BY source_item_id, target_item_id, link_type)"
+            ))
+    # create_all skips tables that already exist, so add indexes introduced later
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    # Same for columns; only nullable ones can be added to existing rows
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    col_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"))
+    backfill_embedding_blobs(engine)
+    init_tag_fts(engine)
+
+def backfill_embedding_blobs(bind, batch_size: int = 500) -> int:
+    """
+    Packs embeddings that only exist as JSON into (lossless) float32 blobs
+    and empties the JSON copy. A no-op once every row has a blob; returns rows converted.
+    """
+    from api.models import ItemEmbedding
+    table = ItemEmbedding.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("_id"))
+        .values(embedding_blob=bindparam("_blob"), embedding_norm=bindparam("_norm"), embedding_json=[])
+    )
+    converted = 0
+    last_id = ""
+    while True:
+        with bind.begin() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.embedding_json)
+                .where(table.c.embedding_blob.is_(None), table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return converted
+            params = []
+            for row_id, value in rows:
+                try:
+                    # Written as json.dumps() into a JSON column, so usually a string
+                    vec = np.asarray(json.loads(value) if isinstance(value, str) else value, dtype="<f4")
+                except (TypeError, ValueError):
+                    continue
+                if vec.ndim != 1 or vec.size == 0:
+                    continue
+                params.append({"_id": row_id, "_blob": vec.tobytes(), "_norm": float(np.linalg.norm(vec))})
+            if params:
+                conn.execute(stmt, params)
+            converted += len(params)
+            last_id = rows[-1][0]
+
+def init_tag_fts(bind):
+    """Creates the tag full-text index; returns False if this SQLite build lacks FTS5 trigram."""
+    try:
+        with bind.begin() as conn:
+            created = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = 'tag_fts'")
+            ).first() is None
+            for statement in TAG_FTS_DDL:
+                conn.execute(text(statement))
+            if created:
+                # Index tags that existed before the table did
+                conn.execute(text("INSERT INTO tag_fts(tag_fts) VALUES ('rebuild')"))
+    except OperationalError:
+        return False
+    return True
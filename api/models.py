@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey, Float, Index
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey, Float, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from api.database import Base
@@ -42,9 +42,18 @@ class ItemEmbedding(Base):
 
     id = Column(String, primary_key=True, default=generate_uuid)
     item_id = Column(String, ForeignKey("entries.id", ondelete="CASCADE"), nullable=False, index=True, unique=True)
-    embedding_json = Column(JSON, nullable=False)  # Store as JSON array for portability
+    # Legacy JSON array; new rows leave it empty and keep the vector in embedding_blob
+    embedding_json = Column(JSON, nullable=False, default=lambda: [])
     embedding_model = Column(String, nullable=False)  # e.g., "mxbai-embed-large:latest"
     embedding_dim = Column(Integer, nullable=False)  # e.g., 1024
+    # Packed vector and its L2 norm (NULL only on rows written before
+    # init_db's back-fill has run). With a scale the blob holds int8 codes
+    # (vector ~= codes * scale); without one, little-endian float32.
+    embedding_blob = Column(LargeBinary, nullable=True)
+    embedding_norm = Column(Float, nullable=True)
+    embedding_scale = Column(Float, nullable=True)
+    # blake2b-128 of the embedded text, so unchanged items can skip re-processing
+    content_hash = Column(LargeBinary, nullable=True)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Composite index for fast model-based queries
@@ -64,10 +73,12 @@ class ItemLink(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
-    # Composite index for efficient graph traversal
+    # Composite index for efficient graph traversal; the unique one backs
+    # the ON CONFLICT upsert in SecondBrainService._store_links
     __table_args__ = (
         Index('idx_links_source_type', 'source_item_id', 'link_type'),
         Index('idx_links_target_type', 'target_item_id', 'link_type'),
+        Index('uq_links_source_target_type', 'source_item_id', 'target_item_id', 'link_type', unique=True),
     )
 
 # =============================================================================
@@ -93,6 +104,9 @@ class Entry(Base):
     outgoing_links = relationship("ItemLink", foreign_keys="ItemLink.source_item_id", back_populates="source_entry", cascade="all, delete-orphan")
     incoming_links = relationship("ItemLink", foreign_keys="ItemLink.target_item_id", back_populates="target_entry", cascade="all, delete-orphan")
 
+    # "Latest entry of type X" lookups resolve to a single index probe
+    __table_args__ = (Index('idx_entries_feature_created', 'feature_type', 'created_at'),)
+
 
 # Patch relationship back-references
 Tag.item_tags = relationship("ItemTag", back_populates="tag", cascade="all, delete-orphan")
@@ -1,4 +1,5 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import asyncio
@@ -62,6 +63,9 @@ async def lifespan(app: FastAPI):
     # (Checking logic happens in background or parallel usually, but here we just mark progress)
     
     print("[STATUS] 90 || Warming up API...", flush=True)
+    if orchestrator:
+        # Load models in the background; don't hold up startup
+        asyncio.get_running_loop().run_in_executor(None, orchestrator.warm_up)
     print("[STATUS] 100 || App Ready", flush=True)
     yield
     
@@ -362,8 +366,8 @@ def submit_survey(answers: Dict[str, int]):
             tags=["survey", "onboarding"]
         )
         
-        # Force reload profile immediately (naive)
-        orch.user_profile = orch._load_user_profile()
+        # Switch to the new profile immediately
+        orch.update_user_profile(text_payload)
         
         return {"status": "saved", "entry_id": entry_id}
     except Exception as e:
@@ -434,6 +438,22 @@ Your response:"""
             "response": "I'm here to listen. Could you tell me more about what's on your mind?"
         }
 
+@app.post("/chat/stream")
+def chat_message_stream(req: ChatRequest):
+    """
+    Streaming variant of /chat. Returns the AI response as a plain-text token stream
+    so the UI can render it incrementally.
+    """
+    orch = require_orchestrator()
+    
+    if not req.message.strip():
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+    
+    return StreamingResponse(
+        orch.chat_session_stream(req.message, req.context or []),
+        media_type="text/plain; charset=utf-8"
+    )
+
 class DiarySaveRequest(BaseModel):
     transcript: List[Dict[str, str]]
 
@@ -555,10 +575,16 @@ def get_diary_entry(entry_id: str):
             
             clean_text = sanitize_think_tags(entry.text)
             
-            # Parse transcript from stored format
-            # Format: "Summary\n\n---\n[Full Transcript]\nrole: content\nrole: content"
+            # Transcript is stored as structured payload in entry.meta.
+            # Legacy entries embedded it in the text:
+            # "Summary\n\n---\n[Full Transcript]\nrole: content\nrole: content"
             transcript = []
-            if "---" in clean_text and "[Full Transcript]" in clean_text:
+            if entry.meta and entry.meta.get("transcript"):
+                transcript = [
+                    {"role": m.get("role", "user"), "content": m.get("content", "")}
+                    for m in entry.meta["transcript"]
+                ]
+            elif "---" in clean_text and "[Full Transcript]" in clean_text:
                 transcript_section = clean_text.split("[Full Transcript]")[-1].strip()
                 for line in transcript_section.split('\n'):
                     line = line.strip()
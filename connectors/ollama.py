@@ -1,16 +1,51 @@
+import json
+import threading
+from collections import OrderedDict
 import httpx
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
+
+# Embedding responses are ~1k floats of JSON; orjson parses them several times faster
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # pragma: no cover
+    _json_loads = json.loads
 from utils.errors import (
     OllamaError, OllamaUnreachableError, OllamaTimeoutError, 
     OllamaModelNotFoundError, OllamaBadResponseError
 )
 
 class OllamaClient:
-    def __init__(self, base_url: str = "http://127.0.0.1:11434", timeout: float = 120.0):
+    # Single-text embeds are query embeddings (chat, reflection, Second Brain
+    # context) that often repeat within a session; remember the most recent ones
+    EMBED_CACHE_SIZE = 256
+
+    def __init__(self, base_url: str = "http://127.0.0.1:11434", timeout: float = 120.0, max_parallel: int = 1):
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
-        import threading
-        self.lock = threading.Lock() # Serialize requests to prevent local GPU panic
+        # Bounds in-flight requests; the default of 1 serializes them to prevent local GPU panic
+        self.max_parallel = max(1, max_parallel)
+        self.lock = threading.BoundedSemaphore(self.max_parallel)
+        # Flipped off when the server turns out to predate /api/embed
+        self._batch_embed_supported = True
+        self._embed_cache: "OrderedDict[tuple, List[float]]" = OrderedDict()
+        self._embed_cache_lock = threading.Lock()
+        # One keep-alive pool for the client's lifetime instead of a new TCP
+        # connection per request, with a socket for every request allowed in flight.
+        # Idle sockets are kept longer than httpx's 5s default since background
+        # jobs arrive in sporadic bursts.
+        pool_size = max(4, max_parallel)
+        self._client = httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=30.0
+            )
+        )
+
+    def close(self):
+        """Closes pooled connections."""
+        self._client.close()
 
     def _handle_request(self, method: str, endpoint: str, **kwargs) -> Any:
         import time
@@ -18,13 +53,13 @@ class OllamaClient:
         max_retries = 3
         backoff = 2.0
         
-        # Acquire lock to ensure only one request hits Ollama at a time
+        # Acquire a slot so at most max_parallel requests hit Ollama at a time
         with self.lock:
             for i in range(max_retries):
                 try:
-                    response = httpx.request(method, url, timeout=self.timeout, **kwargs)
+                    response = self._client.request(method, url, **kwargs)
                     response.raise_for_status()
-                    return response.json()
+                    return _json_loads(response.content)
                 except httpx.ConnectError:
                     raise OllamaUnreachableError(f"Could not connect to Ollama at {self.base_url}")
                 except httpx.TimeoutException:
@@ -61,7 +96,22 @@ class OllamaClient:
             raise OllamaBadResponseError("Unexpected format in /api/tags response")
 
     def embed(self, model: str, prompt: str) -> List[float]:
-        """Generates embeddings for a single string."""
+        """Generates embeddings for a single string (LRU-cached per model and text)."""
+        key = (model, prompt)
+        with self._embed_cache_lock:
+            cached = self._embed_cache.get(key)
+            if cached is not None:
+                self._embed_cache.move_to_end(key)
+                return list(cached)
+
+        embedding = self._embed_uncached(model, prompt)
+        with self._embed_cache_lock:
+            self._embed_cache[key] = embedding
+            if len(self._embed_cache) > self.EMBED_CACHE_SIZE:
+                self._embed_cache.popitem(last=False)
+        return list(embedding)
+
+    def _embed_uncached(self, model: str, prompt: str) -> List[float]:
         payload = {
             "model": model,
             "prompt": prompt
@@ -76,6 +126,41 @@ class OllamaClient:
         except KeyError:
              raise OllamaBadResponseError("Missing 'embedding' in response")
 
+    def embed_batch(self, model: str, inputs: List[str]) -> List[List[float]]:
+        """Generates embeddings for many strings in one request (/api/embed)."""
+        if not inputs:
+            return []
+        if not self._batch_embed_supported:
+            return self._embed_each(model, inputs)
+        payload = {
+            "model": model,
+            "input": inputs
+        }
+        try:
+            data = self._handle_request("POST", "/api/embed", json=payload)
+            embeddings = data["embeddings"]
+        except KeyError:
+            raise OllamaBadResponseError("Missing 'embeddings' in response")
+        except OllamaBadResponseError as e:
+            if "404" not in str(e):
+                raise
+            # Ollama < 0.2 has no /api/embed. If the per-text endpoint works
+            # (i.e. the 404 wasn't a missing model), stick to it from now on.
+            embeddings = self._embed_each(model, inputs)
+            self._batch_embed_supported = False
+            return embeddings
+        if len(embeddings) != len(inputs):
+            raise OllamaBadResponseError(f"Expected {len(inputs)} embeddings, got {len(embeddings)}")
+        return embeddings
+
+    def _embed_each(self, model: str, inputs: List[str]) -> List[List[float]]:
+        """Per-text fallback for embed_batch, overlapped up to max_parallel requests."""
+        if self.max_parallel == 1 or len(inputs) == 1:
+            return [self._embed_uncached(model, text) for text in inputs]
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(self.max_parallel, len(inputs))) as pool:
+            return list(pool.map(lambda text: self._embed_uncached(model, text), inputs))
+
     def chat(self, model: str, messages: List[Dict[str, str]], stream: bool = False, options: Dict[str, Any] = None) -> Dict[str, Any]:
         """Simple non-streaming chat completion."""
         if stream:
@@ -96,6 +181,54 @@ class OllamaClient:
                  raise OllamaModelNotFoundError(f"Model '{model}' not found")
             raise
 
+    def chat_stream(self, model: str, messages: List[Dict[str, str]], options: Dict[str, Any] = None) -> Iterator[str]:
+        """
+        Streaming chat completion. Yields content tokens as Ollama decodes them.
+        """
+        url = f"{self.base_url}/api/chat"
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": True,
+        }
+        if options:
+            payload["options"] = options
+
+        # Hold the request slot for the whole stream
+        with self.lock:
+            try:
+                with self._client.stream("POST", url, json=payload) as r:
+                    if r.status_code == 404:
+                        raise OllamaModelNotFoundError(f"Model '{model}' not found")
+                    r.raise_for_status()
+                    for line in r.iter_lines():
+                        if not line:
+                            continue
+                        try:
+                            chunk = _json_loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        if "error" in chunk:
+                            raise OllamaBadResponseError(chunk["error"])
+                        token = chunk.get("message", {}).get("content", "")
+                        if token:
+                            yield token
+                        if chunk.get("done"):
+                            break
+            except httpx.ConnectError:
+                raise OllamaUnreachableError(f"Could not connect to Ollama at {self.base_url}")
+            except httpx.TimeoutException:
+                raise OllamaTimeoutError(f"Request to {url} timed out after {self.timeout}s")
+            except httpx.HTTPStatusError as e:
+                raise OllamaBadResponseError(f"HTTP {e.response.status_code}: {e}")
+
+    def load_model(self, model: str):
+        """
+        Loads a chat model into memory without generating anything
+        (an empty-messages chat request), so the first real request doesn't pay the load cost.
+        """
+        self._handle_request("POST", "/api/chat", json={"model": model, "messages": []})
+
     def check_health(self) -> bool:
         """Quick check if reachable."""
         try:
@@ -111,12 +244,11 @@ class OllamaClient:
         url = f"{self.base_url}/api/pull"
         payload = {"name": model, "stream": True}
         
-        import json
-        with httpx.stream("POST", url, json=payload, timeout=None) as r:
+        with self._client.stream("POST", url, json=payload, timeout=None) as r:
             r.raise_for_status()
             for line in r.iter_lines():
                 if line:
                     try:
-                        yield json.loads(line)
+                        yield _json_loads(line)
                     except:
                         pass
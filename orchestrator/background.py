@@ -4,6 +4,10 @@ from typing import Optional
 from settings.manager import SettingsManager
 from orchestrator.engine import Orchestrator
 from orchestrator.queues import JobQueue
+from second_brain.ollama_adapter import OLLAMA_BREAKER
+
+# Second Brain jobs taken off the queue together share one embedding request
+SECOND_BRAIN_BATCH_SIZE = 32
 
 class BackgroundWorker:
     def __init__(self, orchestrator: Orchestrator):
@@ -18,42 +22,54 @@ class BackgroundWorker:
         print("Starting Background Worker...")
         while self.running:
             try:
-                # Naively process one job at a time
-                await self.process_next_job()
-                # If queue empty, sleep
-                # Optimally we check if job was processed, if not sleep.
-                # For MVP, simple sleep is fine.
-                await asyncio.sleep(self.poll_interval)
+                # Keep draining while there is work; sleep only when the queue is empty
+                if not await self.process_next_job():
+                    await asyncio.sleep(self.poll_interval)
             except Exception as e:
                 print(f"Background Worker Error: {e}")
                 await asyncio.sleep(self.error_backoff)
 
-    async def process_next_job(self):
-        # Process embedding jobs (legacy pipeline)
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, self.orchestrator.run_embedding_worker)
+    async def process_next_job(self) -> bool:
+        """Returns True if a job was taken off a queue."""
+        # Embedding jobs (legacy pipeline) are drained by the Orchestrator's own
+        # embedding thread as soon as they are queued.
 
         # Process Second Brain generation jobs (async-friendly)
         # These require LLM calls for tagging and linking
-        await self._process_second_brain_jobs()
+        return await self._process_second_brain_jobs()
 
-    async def _process_second_brain_jobs(self):
-        """Process pending Second Brain tasks from the queue."""
-        from second_brain.background_processor import SecondBrainTask
+    async def _process_second_brain_jobs(self) -> bool:
+        """Process the pending Second Brain tasks (up to a batch) from the generation queue."""
+        # Leave jobs queued while Ollama is known to be down
+        if OLLAMA_BREAKER.is_open():
+            return False
 
-        job = self.orchestrator.embed_queue.peek()
-        if not job or job.get("type") != "second_brain":
-            return
+        # Pop the jobs immediately to avoid reprocessing
+        popped = self.orchestrator.gen_queue.pop_batch(SECOND_BRAIN_BATCH_SIZE)
+        if not popped:
+            return False
 
-        # Pop the job immediately to avoid reprocessing
-        self.orchestrator.embed_queue.pop()
+        jobs = []
+        for job in popped:
+            if job.get("type") != "second_brain":
+                print(f"Skipping unknown generation job type: {job.get('type')}")
+            else:
+                jobs.append(job)
+        if not jobs:
+            return True
 
         try:
-            result = await self.orchestrator.second_brain_worker.process_job(job)
-            if "error" in result:
-                print(f"Second Brain job failed: {result['error']}")
+            # Embeds every job's content in one request, then runs the rest per job
+            results = await self.orchestrator.second_brain_worker.run_batch(jobs)
+            for job, result in zip(jobs, results):
+                if result.get("error") == "ollama_unavailable":
+                    # Circuit opened mid-batch: requeue rather than drop
+                    self.orchestrator.gen_queue.push(job)
+                elif "error" in result:
+                    print(f"Second Brain job failed: {result['error']}")
         except Exception as e:
             print(f"Second Brain job error: {e}")
+        return True
         
     def stop(self):
         self.running = False
@@ -1,13 +1,20 @@
-from typing import Dict, Any, List, Optional
-import re
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import hashlib
+import json
+import threading
 
 from settings.manager import SettingsManager
 from connectors.ollama import OllamaClient
 from storage.db_manager import DBManager
 from storage.memory import MemoryLayer
 from utils.safety import SafetyGuardrails
+from utils.text_processing import count_tokens
 from orchestrator.queues import JobQueue
+from orchestrator.semantic_cache import SemanticCache
 from orchestrator.survey import SurveyManager
+from second_brain.ollama_adapter import get_ollama_async
 from second_brain.background_processor import (
     SecondBrainWorker,
     queue_second_brain_task,
@@ -32,33 +39,44 @@ def smart_truncate(text: str, max_length: int, prefer_sentence: bool = True) ->
     
     # Try to find a sentence boundary first
     if prefer_sentence:
-        # Find the last sentence-ending punctuation before max_length
+        # Find the last sentence-ending punctuation before max_length. Only a
+        # boundary past 50% of the content is used, so only that window is scanned.
+        window_start = int(max_length * 0.5) + 1
         sentence_end = max(
-            text.rfind('.', 0, max_length),
-            text.rfind('!', 0, max_length),
-            text.rfind('?', 0, max_length)
+            text.rfind('.', window_start, max_length),
+            text.rfind('!', window_start, max_length),
+            text.rfind('?', window_start, max_length)
         )
-        if sentence_end > max_length * 0.5:  # Only use if we get at least 50% of content
+        if sentence_end != -1:
             return text[:sentence_end + 1].strip()
     
-    # Fall back to word boundary
-    last_space = text.rfind(' ', 0, max_length)
-    if last_space > max_length * 0.7:  # Only truncate at word if we get 70%+
+    # Fall back to word boundary (only if we keep 70%+ of the content)
+    last_space = text.rfind(' ', int(max_length * 0.7) + 1, max_length)
+    if last_space != -1:
         return text[:last_space].strip() + "..."
     
     # Last resort: hard truncate
     return text[:max_length - 3].strip() + "..."
 
 
+# Markdown emphasis, heading and bullet characters stripped before labels
+_MARKDOWN_LEAD = "*#- "
+
+
 def parse_summary_response(raw_response: str) -> Dict[str, str]:
     """
     Parse the LLM response to extract title and summary.
     
     Handles:
     - Case-insensitive label detection (Title:, title:, TITLE:, etc.)
+    - Labels wrapped in markdown (**Summary:**), and Summary: mid-line
+    - Summaries spanning several lines, or inline after the title
     - Missing labels with graceful fallbacks
     - Smart truncation to fit UI constraints
     
+    Single pass over the lines, no regexes: responses are short but parsed
+    once per saved session, and the label grammar is trivial.
+    
     Args:
         raw_response: Raw response from LLM
         
@@ -73,34 +91,37 @@ def parse_summary_response(raw_response: str) -> Dict[str, str]:
     if not raw_response:
         return result
     
-    # Normalize: strip but preserve internal structure
-    text = raw_response.strip()
-    
-    # Try case-insensitive label extraction
     title_match = None
-    summary_match = None
+    summary_parts = None
+    lines = []  # All non-empty lines, for the unlabeled fallback
     
-    # Look for title (case-insensitive)
-    title_pattern = re.compile(r'^title:\s*(.+)$', re.MULTILINE | re.IGNORECASE)
-    title_matches = title_pattern.findall(text)
-    if title_matches:
-        # Get the title from the first match
-        title_match = title_matches[0].strip()
-        # Remove any trailing labels or content
-        if "\n" in title_match:
-            title_match = title_match.split("\n")[0].strip()
-        # Remove "Summary:" suffix if present
-        title_match = re.split(r'\s+summary:', title_match, flags=re.IGNORECASE)[0].strip()
+    for line in raw_response.splitlines():
+        ls = line.strip()
+        if not ls:
+            continue
+        lines.append(ls)
+        # Labels may come wrapped in markdown ("**Summary:**", "## Title:", "- Title:")
+        bare = ls.lstrip(_MARKDOWN_LEAD)
+        low = bare.lower()
+        if title_match is None and low.startswith("title:"):
+            title_match = bare[6:].strip(" *")
+            # "Title: ... Summary: ..." on one line
+            idx = title_match.lower().find("summary:")
+            if idx != -1:
+                summary_parts = [title_match[idx + 8:].strip(" *")]
+                title_match = title_match[:idx].strip(" *")
+            continue
+        # "Summary:" counts anywhere in the line ("The summary: ...")
+        idx = low.find("summary:")
+        if idx != -1:
+            summary_parts = [bare[idx + 8:].strip(" *")]
+        elif summary_parts is not None:
+            summary_parts.append(ls)
     
-    # Look for summary (case-insensitive)
-    summary_pattern = re.compile(r'summary:\s*(.+)$', re.IGNORECASE)
-    summary_match = summary_pattern.search(text)
-    if summary_match:
-        summary_match = summary_match.group(1).strip()
+    summary_match = " ".join(p for p in summary_parts if p) if summary_parts else None
     
-    # Fallback: if no labels found, try line-based parsing
+    # Fallback: if no labels found, use line-based parsing
     if not title_match or not summary_match:
-        lines = [l.strip() for l in text.split('\n') if l.strip()]
         if len(lines) >= 2:
             # Assume first non-empty line is title, rest is summary
             if not title_match:
@@ -124,7 +145,57 @@ def parse_summary_response(raw_response: str) -> Dict[str, str]:
     
     return result
 
+# Vector store filter for user-written journal content. Survey answers,
+# onboarding profiles and generated question sets are JSON blobs that only
+# dilute retrieved context, so they are pruned inside the search itself.
+RAG_JOURNAL_FILTER = {"feature_type": {"$in": ["free_diary", "open_diary"]}}
+
+DEFAULT_USER_PROFILE = "Interaction Style: Neutral. New user."
+
+# Cheap token estimate used for prompt budgeting (no tokenizer dependency)
+CHARS_PER_TOKEN = 4
+
+# Fixed probe query for daily-question context; its embedding is memoized
+RECENT_THEMES_QUERY = "Recent thoughts patterns feelings events"
+
+# Static heads of the system prompts. Sections are ordered from least to most
+# volatile (instructions -> profile -> per-turn context) so Ollama can reuse the
+# KV cache of the shared prefix instead of re-running prefill on every call.
+# Keep these byte-identical across calls: no interpolation here.
+REFLECTION_SYSTEM_PREFIX = (
+    "You are a thoughtful AI companion helping users reflect deeply on their lives. "
+    "Your goal is to help the user reflect on their thoughts. "
+)
+
+CHAT_SYSTEM_PREFIX = (
+    "You are a thoughtful AI companion helping users reflect deeply on their lives. "
+    "Your goal is to help the user explore their current thoughts deeper.\n"
+    "INSTRUCTIONS:\n"
+    "- Use the provided context to spot patterns if relevant, but...\n"
+    "- PRIORITIZE the user's [CURRENT INPUT] and emotion.\n"
+    "- Do not be purely retrospective. Focus on the 'now'.\n"
+    "- Keep responses concise (2-3 sentences), warm, and non-judgmental.\n"
+    "- Ask 'why' and 'how' more than 'what' to explore emotions.\n"
+    "- Reference past entries when relevant (e.g., 'Last week you mentioned...')."
+)
+
+
 class Orchestrator:
+    # Max embed jobs drained from the queue per worker tick
+    embed_batch_size = 16
+    # Max chunk texts sent in one /api/embed request
+    embed_request_size = 64
+    # Retry interval for jobs left behind by a failed embedding attempt
+    # (an idle, empty queue is never polled)
+    embed_poll_interval = 2.0
+    # Transcript characters sent to the title/summary prompt (~1500 tokens, so the
+    # instructions plus transcript fit the 2048-token summary context)
+    summary_transcript_max_chars = 6000
+    # Sessions below either threshold get a title/summary extracted from the
+    # user's own words instead of an LLM call
+    summary_min_user_turns = 3
+    summary_min_user_chars = 200
+
     def __init__(self, settings_manager: SettingsManager):
         print("[STATUS] 6 || Reading Settings...", flush=True)
         self.settings = settings_manager.get_config()
@@ -135,70 +206,117 @@ class Orchestrator:
             persistence_path=f"{self.settings.storage_path}/chroma",
             collection_name="journal_entries"
         )
+        try:
+            # Chunks from before feature_type was stored would otherwise never
+            # match RAG_JOURNAL_FILTER; a no-op once it has run
+            backfilled = self.memory.backfill_feature_types(self.journal.get_feature_types)
+            if backfilled:
+                print(f"[STATUS] Tagged {backfilled} stored chunks with their feature type", flush=True)
+        except Exception as e:
+            print(f"Chunk feature_type backfill skipped: {e}", flush=True)
         
         print(f"[STATUS] 12 || Initializing Ollama Bridge ({self.settings.ollama.base_url})...", flush=True)
-        self.ollama = OllamaClient(self.settings.ollama.base_url)
+        self.ollama = OllamaClient(
+            self.settings.ollama.base_url,
+            max_parallel=self.settings.ollama.max_parallel_requests
+        )
         self.safety = SafetyGuardrails()
         self.survey_manager = SurveyManager()
         
         self.embed_queue = JobQueue(f"{self.settings.storage_path}/embed_jobs.jsonl")
         self.gen_queue = JobQueue(f"{self.settings.storage_path}/gen_jobs.jsonl")
 
+        # Small pool to overlap independent retrieval steps (Second Brain + RAG)
+        self._retrieval_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="retrieval")
+        # Exact + semantic cache of LLM replies for repeat/near-repeat queries
+        self._response_cache = SemanticCache()
+
         # Load User Profile
         print("[STATUS] 18 || Loading User Profile...", flush=True)
         self.user_profile = self._load_user_profile()
+        self._prompt_profile: Optional[str] = None  # Profile the cached prompt heads were built for
+        self._recent_themes_vec: Optional[Tuple[str, List[float]]] = None  # (embed model, vector)
 
         # Initialize Second Brain components
         print("[STATUS] 19 || Initializing Second Brain...", flush=True)
+        # Second Brain services expect the async interface
+        sb_ollama = get_ollama_async(self.ollama)
         self.second_brain_worker = SecondBrainWorker(
-            self.ollama,
+            sb_ollama,
             self.settings.ollama.embed_model,
             self.settings.ollama.chat_model
         )
         self.second_brain_injector = SecondBrainContextInjector(
-            self.ollama,
+            sb_ollama,
             self.settings.ollama.embed_model
         )
 
+        # Embedding runs on its own thread, woken up by process_new_entry
+        self._embed_wakeup = threading.Event()
+        self._embed_stop = threading.Event()
+        self._embed_thread = threading.Thread(target=self._embed_loop, daemon=True, name="EmbeddingWorker")
+        self._embed_thread.start()
+
     def _load_user_profile(self) -> str:
-        """Scans journal for latest survey entry."""
-        # Inefficient for large journals, but fine for MVP MVP with small data.
-        # Ideally, we query an index. 
-        # Since we don't have a fast index for 'feature_type' in FileStorage yet,
-        # we can just assume it's rare or check a cached file.
-        # For true MVP: Iterate all entries.
-        entries = self.journal.get_entries(limit=1000) # Check last 1000
-        for e in entries:
-            if e.get("feature_type") == "survey":
-                # Found one. Compute profile.
-                # Assuming 'text' field contains JSON string of answers or we look at payload?
-                # The prompt said "Persist raw answers".
-                # Let's assume the 'chunks' or structure holds it, or we stored it in 'text' as a JSON blob.
-                # Or better, we store the *computed* profile in a new field if possible, 
-                # but 'text' is the canonical content.
-                # Let's assume 'text' is the Computed Profile Text for simplicity of reading,
-                # and raw answers are in `tags` or a specific metadata field we haven't implemented yet.
-                # Actually, prompts said "Persist raw answers".
-                # Let's assume the entry `text` is the JSON of answers.
-                try:
-                    import json
-                    answers = json.loads(e["text"])
-                    return self.survey_manager.compute_profile_text(answers)
-                except:
-                    pass
-        
-        return "Interaction Style: Neutral. New user."
+        """
+        Profile text for the latest survey entry.
+        The computed text is cached in profile_cache.json, keyed by a hash of the
+        raw answers, so restarts skip re-scoring unless the survey changed.
+        """
+        entry = self.journal.get_latest_entry(feature_type="survey")
+        if not entry:
+            return DEFAULT_USER_PROFILE
+        # The entry `text` is the JSON of the raw answers
+        return self._profile_from_survey_text(entry["text"])
 
+    def _profile_from_survey_text(self, survey_text: str) -> str:
+        """Profile text for a JSON answers payload, via the on-disk profile cache."""
+        answers_hash = hashlib.md5(survey_text.encode("utf-8")).hexdigest()
+        cache_path = Path(self.settings.storage_path) / "profile_cache.json"
+        try:
+            cached = json.loads(cache_path.read_text(encoding="utf-8"))
+            if cached.get("hash") == answers_hash:
+                return cached["profile_text"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
 
-    def process_new_entry(self, text: str, feature_type: str, tags: List[str] = None):
+        try:
+            profile_text = self.survey_manager.compute_profile_text(json.loads(survey_text))
+        except (json.JSONDecodeError, KeyError, AttributeError) as e:
+            print(f"Profile computation failed: {e}")
+            return DEFAULT_USER_PROFILE
+
+        try:
+            cache_path.write_text(
+                json.dumps({"hash": answers_hash, "profile_text": profile_text}),
+                encoding="utf-8"
+            )
+        except OSError as e:
+            print(f"Profile cache write failed: {e}")
+        return profile_text
+
+    def update_user_profile(self, survey_text: str) -> str:
+        """
+        Switches to the profile for freshly submitted survey answers (JSON text)
+        without re-reading the journal, and rebuilds the cached prompt heads now
+        rather than on the next chat turn.
+        """
+        self.user_profile = self._profile_from_survey_text(survey_text)
+        self._prompt_heads()
+        return self.user_profile
+
+    def process_new_entry(self, text: str, feature_type: str, tags: List[str] = None, payload_extras: Dict[str, Any] = None):
         """
         Main entry point for saving content.
         1. Access Journal Storage -> Write
         2. Create Embedding Job -> Queue
         3. Create Second Brain Job -> Queue (for tagging, linking, knowledge graph)
+        
+        `text` is what gets embedded and tagged. `payload_extras` is stored with the
+        entry (Entry.meta) but never vectorized.
         """
         # 1. Save to Journal
-        entry_id = self.journal.add_entry(text, feature_type, tags)
+        entry_id = self.journal.add_entry(text, feature_type, tags, meta=payload_extras)
 
         # 2. Queue for Embedding (legacy Chroma pipeline)
         if feature_type != "no_memory": # Check consent
@@ -206,14 +324,16 @@ class Orchestrator:
                 "type": "embed",
                 "entry_id": entry_id,
                 "text": text,
+                "feature_type": feature_type,
                 "timestamp": 0 # TODO: use real TS
             })
+            self._embed_wakeup.set()
 
         # 3. Queue for Second Brain processing (tagging, linking, embeddings)
         # This runs in parallel and enhances the knowledge graph
         if feature_type != "no_memory":
             queue_second_brain_task(
-                self.embed_queue,  # Reuse same queue file for simplicity
+                self.gen_queue,  # Own queue: slow LLM tagging must not block embeddings
                 item_id=entry_id,
                 content=text,
                 item_type=feature_type
@@ -221,14 +341,39 @@ class Orchestrator:
 
         return entry_id
 
-    def run_embedding_worker(self):
+    def _embed_loop(self):
+        """Embedding thread: drains the queue, then sleeps until process_new_entry wakes it."""
+        while not self._embed_stop.is_set():
+            while not self._embed_stop.is_set() and self.run_embedding_worker():
+                pass
+            # Jobs still queued means the last attempt failed: retry after a pause.
+            # Otherwise block until a producer (or shutdown) sets the event.
+            timeout = self.embed_poll_interval if self.embed_queue.peek() else None
+            self._embed_wakeup.wait(timeout=timeout)
+            self._embed_wakeup.clear()
+
+    def run_embedding_worker(self) -> int:
         """
-        Processes one item from the embedding queue.
-        Should be called periodically or by a background thread.
+        Processes pending items from the embedding queue.
+        Drains up to `embed_batch_size` consecutive embed jobs and upserts all
+        of their chunks in a single vector store call.
+        Driven by the embedding thread (see _embed_loop).
+        Returns the number of jobs completed.
         """
-        job = self.embed_queue.peek()
-        if not job:
-            return
+        jobs = []
+        for job in self.embed_queue.peek_batch(self.embed_batch_size):
+            if job.get("type") != "embed":
+                if jobs:
+                    break
+                # Queue files written by older versions also hold Second Brain
+                # tasks: hand them over to their own queue
+                self.gen_queue.push(job)
+                self.embed_queue.pop()
+                return 1
+            jobs.append(job)
+
+        if not jobs:
+            return 0
             
         try:
             # 1. Generate Embedding
@@ -236,70 +381,133 @@ class Orchestrator:
             import uuid
             from utils.text_processing import chunk_text
             
-            text_chunks = chunk_text(job["text"])
-            chunks_to_upsert = []
-            vectors_to_upsert = []
-            
-            for i, chunk in enumerate(text_chunks):
-                # Embed each chunk
-                vec = self.ollama.embed(self.settings.ollama.embed_model, chunk)
-                
-                chunk_id = str(uuid.uuid5(uuid.UUID(job['entry_id']), str(i)))
-                
-                chunks_to_upsert.append({
-                    "entry_id": job["entry_id"],
-                    "text": chunk,
-                    "chunk_index": i,
-                    "chunk_id": chunk_id
-                })
-                vectors_to_upsert.append(vec)
-
-            if chunks_to_upsert:
-                self.memory.upsert_chunks(chunks_to_upsert, vectors_to_upsert)
+            # Flatten chunks of all drained jobs into parallel columns (the shape
+            # both /api/embed and Chroma take) so they are embedded in batched requests
+            ids, texts, metadatas = [], [], []
+            for job in jobs:
+                entry_uuid = uuid.UUID(job["entry_id"])
+                feature_type = job.get("feature_type", "")
+                for i, chunk in enumerate(chunk_text(job["text"])):
+                    ids.append(str(uuid.uuid5(entry_uuid, str(i))))
+                    texts.append(chunk)
+                    metadatas.append({
+                        "entry_id": job["entry_id"],
+                        "feature_type": feature_type,
+                        "chunk_index": i
+                    })
+
+            vectors = []
+            for start in range(0, len(texts), self.embed_request_size):
+                vectors.extend(
+                    self.ollama.embed_batch(
+                        self.settings.ollama.embed_model,
+                        texts[start:start + self.embed_request_size]
+                    )
+                )
+
+            if ids:
+                self.memory.upsert_columns(ids, vectors, texts, metadatas)
             
             # 3. Remove from queue
-            self.embed_queue.pop()
+            self.embed_queue.pop_batch(len(jobs))
+            return len(jobs)
             
         except Exception as e:
             print(f"Embedding failed: {e}")
             # Retry logic needed here (exponential backoff)
+            return 0
 
-    def generate_reflection(self, context_query: str) -> str:
-        """Generates a reflection based on context."""
-        # 1. Second Brain Context Retrieval
-        second_brain_context = ""
+    def _prompt_heads(self) -> Tuple[str, str]:
+        """
+        Returns (reflection_head, chat_head): the static instructions plus the
+        profile section, i.e. everything in the system prompts that does not change
+        between turns. Rebuilt only when self.user_profile is reassigned.
+        """
+        if self._prompt_profile is not self.user_profile:
+            self._reflection_sys_head = (
+                f"{REFLECTION_SYSTEM_PREFIX}"
+                f"{self.safety.get_system_prompt_addendum()}"
+                f"\n[PERSONALIZATION]\n{self.user_profile}\n"
+            )
+            self._chat_sys_head = f"{CHAT_SYSTEM_PREFIX}\n\n[USER PROFILE]:\n{self.user_profile}"
+            self._prompt_profile = self.user_profile
+        return self._reflection_sys_head, self._chat_sys_head
+
+    def _get_second_brain_context(self, query_text: str, token_budget: int = 400) -> str:
+        """Second Brain context summary for prompt injection. Never raises."""
         try:
-            second_brain_context = self.second_brain_injector.get_context_sync(
-                query_text=context_query,
-                token_budget=400
+            result = self.second_brain_injector.get_context_sync(
+                query_text=query_text,
+                token_budget=token_budget
             )
+            # Only the summary belongs in the prompt, not item lists or timing metrics
+            return result.get("summary", "") if isinstance(result, dict) else (result or "")
         except Exception as e:
             print(f"Second Brain context retrieval failed: {e}")
-            second_brain_context = ""
+            return ""
+
+    @staticmethod
+    def _format_hits(hits: List[Dict[str, Any]], max_chars: int = 400) -> str:
+        """
+        Formats vector search hits as a bullet list for prompts.
+        Keeps one hit per entry (hits are ranked, so the best chunk wins) and
+        truncates each at a sentence boundary to keep prompt tokens down.
+        """
+        seen = set()
+        lines = []
+        for h in hits:
+            entry_id = h.get("entry_id")
+            if entry_id is not None:
+                if entry_id in seen:
+                    continue
+                seen.add(entry_id)
+            lines.append(f"- {smart_truncate(h.get('text', ''), max_chars)}")
+        return "\n".join(lines)
+
+    def _retrieve_context(self, query_text: str, limit: int, filters: Dict[str, Any] = None) -> Tuple[List[float], List[Dict[str, Any]]]:
+        """
+        Embeds the query and searches the vector store. Raises on failure.
+        Returns (query_vec, hits) so callers can reuse the vector for the response cache.
+        """
+        query_vec = self.ollama.embed(self.settings.ollama.embed_model, query_text)
+        return query_vec, self.memory.search(query_vec, limit=limit, filters=filters)
+
+    def _cached_response(self, cache_key: str, query_vec: Optional[List[float]], scope: str) -> Optional[str]:
+        """Exact prompt-hash hit first, then a semantic hit on the query vector."""
+        cached = self._response_cache.get_exact(cache_key)
+        if cached is None and query_vec is not None:
+            cached = self._response_cache.lookup(query_vec, scope)
+        return cached
 
-        # 2. Search Memory
+    def generate_reflection(self, context_query: str) -> str:
+        """Generates a reflection based on context."""
+        # 1. Second Brain Context + Memory Search (independent, run concurrently)
+        fut_sb = self._retrieval_pool.submit(self._get_second_brain_context, context_query)
+        fut_rag = self._retrieval_pool.submit(self._retrieve_context, context_query, 3, RAG_JOURNAL_FILTER)
+
+        second_brain_context = fut_sb.result()
+        query_vec = None
         try:
-             query_vec = self.ollama.embed(self.settings.ollama.embed_model, context_query)
-             hits = self.memory.search(query_vec, limit=3)
-              
-             context_text = "\n".join([h.get("text", "") for h in hits])
+             query_vec, hits = fut_rag.result()
+             context_text = self._format_hits(hits)
         except Exception as e:
              print(f"RAG Retrieval failed: {e}")
              context_text = ""
          
         # 3. Form Prompt
-        system_prompt = (
-            "You are a thoughtful AI companion helping users reflect deeply on their lives. "
-            "Your goal is to help the user reflect on their thoughts. "
-            f"\n[SECOND BRAIN CONTEXT]\n{second_brain_context}\n"
-            f"\n[PERSONALIZATION]\n{self.user_profile}\n"
-            f"{self.safety.get_system_prompt_addendum()}"
-        )
+        reflection_head, _ = self._prompt_heads()
+        system_prompt = f"{reflection_head}\n[SECOND BRAIN CONTEXT]\n{second_brain_context}"
          
         user_prompt = f"Relevant past memories:\n{context_text}\n\nCurrent thought or topic: {context_query}\n\nSuggest a deep, non-judgmental follow-up question. Ask 'why' and 'how' more than 'what' to explore emotions."
          
         if not self.safety.check_prompt(user_prompt):
             return "I can't provide a reflection on this topic due to safety guidelines."
+
+        cache_key = SemanticCache.make_key(system_prompt, user_prompt)
+        scope = SemanticCache.make_key("reflection", self.user_profile)
+        cached = self._cached_response(cache_key, query_vec, scope)
+        if cached is not None:
+            return cached
              
         # 3. Call LLM
         try:
@@ -313,11 +521,21 @@ class Orchestrator:
                 options={"num_ctx": self.settings.ollama.num_ctx}
             )
             content = response.get("message", {}).get("content", "")
-            return self.safety.sanitize_response(content)
+            sanitized = self.safety.sanitize_response(content)
+            if sanitized:
+                self._response_cache.insert(cache_key, query_vec, scope, sanitized)
+            return sanitized
         except Exception as e:
             print(f"Generation failed: {e}")
             return "I'm having trouble thinking of a reflection right now. Please tell me more."
 
+    def _recent_themes_vector(self) -> List[float]:
+        """Embedding of RECENT_THEMES_QUERY, computed once per embed model."""
+        model = self.settings.ollama.embed_model
+        if self._recent_themes_vec is None or self._recent_themes_vec[0] != model:
+            self._recent_themes_vec = (model, self.ollama.embed(model, RECENT_THEMES_QUERY))
+        return self._recent_themes_vec[1]
+
     def generate_daily_questions(self) -> Dict[str, Any]:
         """Orchestrates generation of daily questions."""
         from orchestrator.daily_questions import DailyQuestionGenerator
@@ -337,9 +555,9 @@ class Orchestrator:
         recent_themes = ""
         try:
             # Query vector store for recent themes
-            query_vec = self.ollama.embed(self.settings.ollama.embed_model, "Recent thoughts patterns feelings events")
-            hits = self.memory.search(query_vec, limit=5)
-            context_text = "\n".join([f"- {h.get('text', '')}" for h in hits])
+            # (the system prompt embeds this context, so there is nothing to overlap it with)
+            hits = self.memory.search(self._recent_themes_vector(), limit=5, filters=RAG_JOURNAL_FILTER)
+            context_text = self._format_hits(hits)
             
             # Extract recurring themes
             themes = set()
@@ -381,7 +599,6 @@ class Orchestrator:
         # We store as a special entry type or better, use the DailyCycle model if we updated manager to support it.
         # Current DBManager only supports Entry.
         # Let's save as Entry feature_type="daily_questions_set" for MVP compatibility
-        import json
         self.process_new_entry(
             text=json.dumps(payload),
             feature_type="daily_questions_set",
@@ -392,55 +609,82 @@ class Orchestrator:
 
         return entry_id
     
-    def chat_session(self, message: str, context_history: List[Dict[str, str]]) -> str:
+    def _build_chat_messages(self, message: str, context_history: List[Dict[str, str]]) -> Tuple[List[Dict[str, str]], Optional[List[float]]]:
         """
-        Processes a chat message with RAG context from past diary entries.
+        Builds the chat message list (system prompt with RAG context + history + current input).
+        Also returns the query embedding (None if retrieval failed) for the response cache.
         """
-        # 1. Second Brain Context Retrieval
-        second_brain_context = ""
-        try:
-            second_brain_context = self.second_brain_injector.get_context_sync(
-                query_text=message,
-                token_budget=400
-            )
-        except Exception as e:
-            print(f"Second Brain context retrieval failed: {e}")
-            second_brain_context = ""
+        # 1. Second Brain Context + RAG Retrieval (Focus on 'now', but use 'past' for depth)
+        # Both are independent, so run them concurrently while history is prepared.
+        fut_sb = self._retrieval_pool.submit(self._get_second_brain_context, message)
+        fut_rag = self._retrieval_pool.submit(self._retrieve_context, message, 3, RAG_JOURNAL_FILTER)
 
-        # 2. RAG Retrieval (Focus on 'now', but use 'past' for depth)
+        history = self._history_window(context_history)
+
+        second_brain_context = fut_sb.result()
+        query_vec = None
         try:
-            query_vec = self.ollama.embed(self.settings.ollama.embed_model, message)
-            # Filter for diary/journal entries only if possible, but 'open_diary' is the type.
-            hits = self.memory.search(query_vec, limit=3, filters={"feature_type": "open_diary"})
-            rag_context = "\n".join([f"- {h.get('text', '')}" for h in hits])
+            query_vec, hits = fut_rag.result()
+            rag_context = self._format_hits(hits)
         except Exception as e:
             print(f"Chat RAG Failed: {e}")
             rag_context = ""
             
         # 3. Construct System Prompt
+        # Static head first, per-turn context last (keeps the cached prefix valid)
+        _, chat_head = self._prompt_heads()
         system_prompt = (
-            "You are a thoughtful AI companion helping users reflect deeply on their lives. "
-            "Your goal is to help the user explore their current thoughts deeper.\n"
-            "INSTRUCTIONS:\n"
-            "- Use the provided context to spot patterns if relevant, but...\n"
-            "- PRIORITIZE the user's [CURRENT INPUT] and emotion.\n"
-            "- Do not be purely retrospective. Focus on the 'now'.\n"
-            "- Keep responses concise (2-3 sentences), warm, and non-judgmental.\n"
-            "- Ask 'why' and 'how' more than 'what' to explore emotions.\n"
-            "- Reference past entries when relevant (e.g., 'Last week you mentioned...').\n\n"
-            f"[SECOND BRAIN CONTEXT]:\n{second_brain_context}\n\n"
-            f"[PAST DIARY CONTEXT]:\n{rag_context}\n\n"
-            f"[USER PROFILE]:\n{self.user_profile}"
+            f"{chat_head}\n\n[SECOND BRAIN CONTEXT]:\n{second_brain_context}\n\n"
+            f"[PAST DIARY CONTEXT]:\n{rag_context}"
         )
         
         # 4. Call LLM
         messages = [{"role": "system", "content": system_prompt}]
         # Add history
-        for msg in context_history[-5:]:
-            messages.append({"role": msg.get("role", "user"), "content": msg.get("content", "")})
+        messages.extend(history)
         
         # Add current
         messages.append({"role": "user", "content": message})
+        return messages, query_vec
+
+    def _history_window(self, context_history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Most recent chat turns that fit in a third of num_ctx (estimated at
+        CHARS_PER_TOKEN chars/token), oldest first.
+        """
+        budget = self.settings.ollama.num_ctx // 3 * CHARS_PER_TOKEN
+        total = 0
+        kept = []
+        for msg in reversed(context_history):
+            content = msg.get("content", "")
+            total += len(content)
+            if total > budget:
+                break
+            kept.append({"role": msg.get("role", "user"), "content": content})
+        kept.reverse()
+        return kept
+
+    def _chat_cache_keys(self, messages: List[Dict[str, str]]) -> Tuple[str, str]:
+        """
+        (exact key, semantic scope) for a chat turn. The scope includes the history,
+        so a semantic hit is only reused within the same conversation state.
+        """
+        history = messages[1:-1]
+        cache_key = SemanticCache.make_key(*(f"{m['role']}:{m['content']}" for m in messages))
+        scope = SemanticCache.make_key(
+            "chat", self.user_profile, *(f"{m['role']}:{m['content']}" for m in history)
+        )
+        return cache_key, scope
+
+    def chat_session(self, message: str, context_history: List[Dict[str, str]]) -> str:
+        """
+        Processes a chat message with RAG context from past diary entries.
+        """
+        messages, query_vec = self._build_chat_messages(message, context_history)
+        cache_key, scope = self._chat_cache_keys(messages)
+        cached = self._cached_response(cache_key, query_vec, scope)
+        if cached is not None:
+            return cached
         
         try:
             resp = self.ollama.chat(
@@ -448,22 +692,88 @@ class Orchestrator:
                 messages, 
                 options={"num_ctx": self.settings.ollama.num_ctx}
             )
-            return resp.get("message", {}).get("content", "")
+            content = resp.get("message", {}).get("content", "")
+            if content:
+                self._response_cache.insert(cache_key, query_vec, scope, content)
+            return content
         except Exception as e:
             print(f"Chat Gen failed: {e}")
             return "I'm listening. Please go on."
 
+    def chat_session_stream(self, message: str, context_history: List[Dict[str, str]]) -> Iterator[str]:
+        """
+        Streaming variant of chat_session. Yields response tokens as they are decoded
+        so the UI can render incrementally instead of waiting for the full reply.
+        """
+        messages, query_vec = self._build_chat_messages(message, context_history)
+        cache_key, scope = self._chat_cache_keys(messages)
+        cached = self._cached_response(cache_key, query_vec, scope)
+        if cached is not None:
+            yield cached
+            return
+        
+        produced = False
+        tokens = []
+        try:
+            for token in self.ollama.chat_stream(
+                self.settings.ollama.chat_model,
+                messages,
+                options={"num_ctx": self.settings.ollama.num_ctx}
+            ):
+                produced = True
+                tokens.append(token)
+                yield token
+            if tokens:
+                self._response_cache.insert(cache_key, query_vec, scope, "".join(tokens))
+        except Exception as e:
+            print(f"Chat Stream failed: {e}")
+            # Only fall back if nothing reached the client yet
+            if not produced:
+                yield "I'm listening. Please go on."
+
     def save_diary_session(self, full_transcript: List[Dict[str, str]]) -> str:
         """
         Summarizes and saves a completed diary chat session.
         Generates a concise title and summary for the diary book UI.
         """
         # 1. Generate Title and Summary
-        combined_text = "\n".join([f"{m['role']}: {m['content']}" for m in full_transcript])
-        
         title = "Diary Entry"
         summary = "A reflective diary entry."
         
+        user_msgs = [m["content"] for m in full_transcript if m.get("role") == "user" and m.get("content")]
+        short_session = (
+            len(user_msgs) < self.summary_min_user_turns
+            or sum(len(u) for u in user_msgs) < self.summary_min_user_chars
+        )
+        
+        if short_session:
+            # Too little to summarize: the user's own words are as good as an LLM round-trip
+            if user_msgs:
+                title = smart_truncate(" ".join(user_msgs[0].split()[:8]), 60, prefer_sentence=False)
+                summary = smart_truncate(" ".join(user_msgs), 130, prefer_sentence=True)
+        else:
+            title, summary = self._summarize_transcript(full_transcript, title, summary)
+            
+        # 2. Persist
+        # Only title + summary are searchable/embedded; the transcript rides along
+        # as non-vectorized payload so it doesn't dilute (or slow down) embeddings.
+        final_content = f"{title}\n\n{summary}"
+        
+        entry_id = self.process_new_entry(
+            text=final_content,
+            feature_type="open_diary", # This ensures it's found in RAG
+            tags=["diary", "session"],
+            payload_extras={"transcript": full_transcript}
+        )
+        return entry_id
+
+    def _summarize_transcript(self, full_transcript: List[Dict[str, str]], title: str, summary: str) -> Tuple[str, str]:
+        """LLM title/summary for a diary session; returns the given defaults on failure."""
+        combined_text = "\n".join(f"{m['role']}: {m['content']}" for m in full_transcript)
+        # Long sessions would overflow num_ctx and Ollama would silently drop the
+        # head of the prompt (the instructions); cut the transcript instead.
+        combined_text = smart_truncate(combined_text, self.summary_transcript_max_chars)
+        
         try:
             prompt = (
                 "Based ONLY on the following diary conversation, create a very brief title and summary.\n\n"
@@ -488,16 +798,23 @@ class Orchestrator:
         except Exception as e:
             print(f"Summary Gen Failed: {e}")
             
-        # 2. Persist
-        # We save the title + summary as the main content for searching, and the transcript after
-        final_content = f"{title}\n\n{summary}\n\n---\n[Full Transcript]\n{combined_text}"
-        
-        entry_id = self.process_new_entry(
-            text=final_content,
-            feature_type="open_diary", # This ensures it's found in RAG
-            tags=["diary", "session"]
-        )
-        return entry_id
+        return title, summary
+
+    def warm_up(self):
+        """
+        Loads the chat and embedding models into Ollama so the first user request
+        runs at steady-state latency instead of waiting for a cold model load.
+        Best-effort: failures are logged and ignored.
+        """
+        # Loads the local tokenizer (if any) here rather than on the first
+        # context injection, which budgets summaries with truncate_to_tokens
+        count_tokens("warm up")
+        try:
+            self.ollama.load_model(self.settings.ollama.chat_model)
+            self.ollama.embed(self.settings.ollama.embed_model, "warm up")
+            print("[STATUS] Models warmed up", flush=True)
+        except Exception as e:
+            print(f"Model warm-up skipped: {e}", flush=True)
 
     def shutdown(self):
         """
@@ -506,6 +823,13 @@ class Orchestrator:
         """
         print("[SHUTDOWN] Cleaning up orchestrator resources...", flush=True)
         
+        self._retrieval_pool.shutdown(wait=False)
+        
+        # Stop embedding thread
+        self._embed_stop.set()
+        self._embed_wakeup.set()
+        self._embed_thread.join(timeout=2.0)
+        
         # Shutdown Second Brain context injector
         try:
             if hasattr(self, 'second_brain_injector') and self.second_brain_injector:
@@ -514,4 +838,9 @@ class Orchestrator:
         except Exception as e:
             print(f"[SHUTDOWN] Error stopping Second Brain: {e}", flush=True)
         
+        try:
+            self.ollama.close()
+        except Exception as e:
+            print(f"[SHUTDOWN] Error closing Ollama client: {e}", flush=True)
+        
         print("[SHUTDOWN] Orchestrator cleanup complete", flush=True)
@@ -1,44 +1,120 @@
 import json
+import os
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+# Compact the log once the consumed prefix passes this size
+# (or half of the file, whichever comes first)
+COMPACT_MIN_BYTES = 1024 * 1024
+
 
 class JobQueue:
+    """
+    Append-only JSONL job queue.
+    Consumed jobs are not rewritten out of the file on every pop; instead a
+    sidecar `.head` file stores the byte offset of the next unconsumed line.
+    The consumed prefix is dropped by an occasional compaction.
+    """
+
     def __init__(self, file_path: str):
         self.file_path = Path(file_path)
         self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.head_path = self.file_path.with_suffix(".head")
+        # Queue file is shared by the embedding thread and the async worker
+        self._lock = threading.Lock()
+
+    def _read_head(self) -> int:
+        """Byte offset of the next unconsumed job."""
+        try:
+            head = int(self.head_path.read_text(encoding="utf-8").strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+        # Queue file was replaced/truncated behind our back: start over
+        if head > self.file_path.stat().st_size:
+            return 0
+        return head
+
+    def _write_head(self, offset: int):
+        """Atomically persists the head offset."""
+        tmp_path = self.head_path.with_suffix(".head.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(str(offset))
+        os.replace(tmp_path, self.head_path)
+
+    def _read_from_head(self, max_items: int):
+        """Returns (jobs, offset after the last job read)."""
+        head = self._read_head()
+        jobs = []
+        with open(self.file_path, "rb") as f:
+            f.seek(head)
+            while len(jobs) < max_items:
+                line = f.readline()
+                if not line:
+                    break
+                if line.strip():
+                    jobs.append(json.loads(line))
+            return jobs, f.tell()
+
+    def _advance(self, new_head: int):
+        """Moves the head forward and compacts the log when the consumed prefix is large."""
+        size = self.file_path.stat().st_size
+        if new_head >= COMPACT_MIN_BYTES or new_head * 2 > size:
+            # Reset head before swapping the file: a crash in between replays
+            # consumed jobs (at-least-once) rather than seeking into the wrong file.
+            tmp_path = self.file_path.with_suffix(".compact.tmp")
+            with open(self.file_path, "rb") as src, open(tmp_path, "wb") as dst:
+                src.seek(new_head)
+                dst.write(src.read())
+            self._write_head(0)
+            os.replace(tmp_path, self.file_path)
+        else:
+            self._write_head(new_head)
 
     def push(self, job_data: Dict[str, Any]):
         """Appends a job to the queue."""
-        with open(self.file_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(job_data) + "\n")
+        with self._lock:
+            with open(self.file_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(job_data) + "\n")
 
     def peek(self) -> Optional[Dict[str, Any]]:
-        """Reads the first job (naive wrapper)."""
-        if not self.file_path.exists():
-            return None
-        
-        with open(self.file_path, "r", encoding="utf-8") as f:
-            line = f.readline()
-            if line:
-                return json.loads(line)
-        return None
+        """Reads the first unconsumed job without removing it."""
+        with self._lock:
+            if not self.file_path.exists():
+                return None
+
+            jobs, _ = self._read_from_head(1)
+            return jobs[0] if jobs else None
+
+    def peek_batch(self, max_items: int) -> List[Dict[str, Any]]:
+        """Reads up to max_items jobs from the head of the queue without removing them."""
+        with self._lock:
+            if not self.file_path.exists():
+                return []
+
+            jobs, _ = self._read_from_head(max_items)
+            return jobs
+
+    def pop_batch(self, count: int) -> List[Dict[str, Any]]:
+        """Removes the first `count` jobs by advancing the head offset."""
+        with self._lock:
+            if not self.file_path.exists() or count <= 0:
+                return []
+
+            jobs, new_head = self._read_from_head(count)
+            if jobs:
+                self._advance(new_head)
+            return jobs
 
     def pop(self) -> Optional[Dict[str, Any]]:
-        """Removes the first job. Requires rewriting file (slow, but ok for MVP)."""
-        if not self.file_path.exists():
-            return None
-
-        lines = []
-        with open(self.file_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-        
-        if not lines:
-            return None
-            
-        job = json.loads(lines[0])
-        remaining = lines[1:]
-        
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            f.writelines(remaining)
-            
-        return job
+        """Removes the first job by advancing the head offset."""
+        with self._lock:
+            if not self.file_path.exists():
+                return None
+
+            jobs, new_head = self._read_from_head(1)
+            if not jobs:
+                return None
+
+            self._advance(new_head)
+            return jobs[0]
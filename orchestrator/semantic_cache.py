@@ -0,0 +1,113 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+# Cached replies can go stale as new entries land in the journal
+CACHE_TTL_SECONDS = 300
+
+
+class SemanticCache:
+    """
+    Two-tier cache for LLM responses.
+
+    System-1: exact match on a hash of the full prompt.
+    System-2: cosine similarity of the query embedding against a small FIFO of
+    recent (vector, response) pairs. Entries carry a scope key so answers never
+    cross profiles (or, for chat, conversation histories).
+    """
+
+    def __init__(self, maxlen: int = 256, threshold: float = 0.92, ttl_seconds: float = CACHE_TTL_SECONDS):
+        self.maxlen = maxlen
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._exact: "OrderedDict[str, tuple]" = OrderedDict()
+        # Ring buffer of unit-normalized query vectors, allocated on first insert
+        self._vecs: Optional[np.ndarray] = None
+        self._scopes = np.empty(maxlen, dtype=object)
+        self._stamps = np.zeros(maxlen)
+        self._responses = [None] * maxlen
+        self._next = 0
+        self._count = 0
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """MD5 over the given parts; used for exact-match and scope keys."""
+        h = hashlib.md5()
+        for part in parts:
+            h.update(str(part).encode("utf-8"))
+            h.update(b"\x00")
+        return h.hexdigest()
+
+    @staticmethod
+    def _normalize(vec) -> Optional[np.ndarray]:
+        v = np.asarray(vec, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        if v.ndim != 1 or norm == 0:
+            return None
+        return v / norm
+
+    def get_exact(self, key: str) -> Optional[str]:
+        """System-1 lookup by prompt hash."""
+        with self._lock:
+            hit = self._exact.get(key)
+            if hit is None:
+                return None
+            response, stamp = hit
+            if time.time() - stamp > self.ttl_seconds:
+                del self._exact[key]
+                return None
+            return response
+
+    def lookup(self, vec, scope: str) -> Optional[str]:
+        """System-2 lookup: most similar cached query within the same scope."""
+        q = self._normalize(vec)
+        with self._lock:
+            if q is None or self._vecs is None or self._count == 0 or q.shape[0] != self._vecs.shape[1]:
+                return None
+
+            n = self._count
+            sims = self._vecs[:n] @ q
+            valid = (self._scopes[:n] == scope) & (time.time() - self._stamps[:n] <= self.ttl_seconds)
+            sims = np.where(valid, sims, -1.0)
+            best = int(np.argmax(sims))
+            if sims[best] >= self.threshold:
+                return self._responses[best]
+            return None
+
+    def insert(self, key: str, vec, scope: str, response: str):
+        """Stores a response under both tiers (the semantic tier only if vec is usable)."""
+        now = time.time()
+        q = self._normalize(vec) if vec is not None else None
+        with self._lock:
+            self._exact[key] = (response, now)
+            self._exact.move_to_end(key)
+            while len(self._exact) > self.maxlen:
+                self._exact.popitem(last=False)
+
+            if q is None:
+                return
+            if self._vecs is None or self._vecs.shape[1] != q.shape[0]:
+                # First insert, or the embedding model changed: start a fresh buffer
+                self._vecs = np.zeros((self.maxlen, q.shape[0]), dtype=np.float32)
+                self._next = 0
+                self._count = 0
+
+            i = self._next
+            self._vecs[i] = q
+            self._scopes[i] = scope
+            self._stamps[i] = now
+            self._responses[i] = response
+            self._next = (i + 1) % self.maxlen
+            self._count = min(self._count + 1, self.maxlen)
+
+    def clear(self):
+        with self._lock:
+            self._exact.clear()
+            self._vecs = None
+            self._next = 0
+            self._count = 0
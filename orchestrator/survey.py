@@ -1,6 +1,9 @@
 from typing import List, Dict, Any
+import numpy as np
 from pydantic import BaseModel
 
+DIMENSIONS = ["Openness", "Conscientiousness", "Extraversion", "Agreeableness", "Neuroticism"]
+
 class SurveyQuestion(BaseModel):
     id: str
     text: str
@@ -32,6 +35,12 @@ class SurveyManager:
         SurveyQuestion(id="n2_r", text="I see myself as calm, emotionally stable.", dimension="Neuroticism", reverse=True),
     ]
 
+    def __init__(self):
+        # Question -> row / dimension / reverse lookup tables for vectorized scoring
+        self._id_to_row = {q.id: i for i, q in enumerate(self.QUESTIONS)}
+        self._dim_idx = np.array([DIMENSIONS.index(q.dimension) for q in self.QUESTIONS], dtype=np.int8)
+        self._reverse = np.array([q.reverse for q in self.QUESTIONS], dtype=bool)
+
     def get_questions(self) -> List[Dict[str, Any]]:
         return [q.model_dump() for q in self.QUESTIONS]
 
@@ -40,51 +49,40 @@ class SurveyManager:
         Input: Dict of {question_id: score_1_to_7}
         Output: A prompt-ready string description of preferences.
         """
-        scores = {d: 0 for d in ["Openness", "Conscientiousness", "Extraversion", "Agreeableness", "Neuroticism"]}
-        counts = {d: 0 for d in scores}
-        
-        # Mapping
-        q_map = {q.id: q for q in self.QUESTIONS}
-        
+        raw = np.full(len(self.QUESTIONS), np.nan)
         for q_id, score in answers.items():
-            if q_id not in q_map:
-                continue
-            
-            q = q_map[q_id]
-            # Normalize score 1-7 (assuming 7 point likert)
-            val = score
-            if q.reverse:
-                val = 8 - score # Reverse: 1->7, 7->1
-            
-            scores[q.dimension] += val
-            counts[q.dimension] += 1
+            row = self._id_to_row.get(q_id)
+            if row is not None:
+                raw[row] = score
+        
+        # Normalize score 1-7 (assuming 7 point likert); reverse: 1->7, 7->1
+        vals = np.where(self._reverse, 8 - raw, raw)
+        answered = ~np.isnan(vals)
+        sums = np.bincount(self._dim_idx, weights=np.where(answered, vals, 0.0), minlength=len(DIMENSIONS))
+        counts = np.bincount(self._dim_idx, weights=answered, minlength=len(DIMENSIONS))
+        avg_o, avg_c, avg_e, avg_a, avg_n = (sums / np.maximum(1, counts)).tolist()
             
         # Generate Text Signals
         signals = []
         
         # Openness
-        avg_o = scores["Openness"] / max(1, counts["Openness"])
         if avg_o > 5.5: signals.append("User likely enjoys exploring new, abstract ideas.")
         elif avg_o < 3.5: signals.append("User likely prefers practical, familiar topics.")
         else: signals.append("User balances novelty with tradition.")
 
         # Conscientiousness
-        avg_c = scores["Conscientiousness"] / max(1, counts["Conscientiousness"])
         if avg_c > 5.5: signals.append("Preferred style: Structured, goal-oriented interactions.")
         elif avg_c < 3.5: signals.append("Preferred style: Flexible, spontaneous flow.")
         
         # Extraversion
-        avg_e = scores["Extraversion"] / max(1, counts["Extraversion"])
         if avg_e > 5.5: signals.append("Tone: Energetic and social.")
         elif avg_e < 3.5: signals.append("Tone: Calm and reflective.")
         
         # Agreeableness
-        avg_a = scores["Agreeableness"] / max(1, counts["Agreeableness"])
         if avg_a > 5.5: signals.append("User values harmony and empathy highly.")
         elif avg_a < 3.5: signals.append("User appreciates directness and debate.")
         
         # Neuroticism
-        avg_n = scores["Neuroticism"] / max(1, counts["Neuroticism"])
         if avg_n > 5.5: signals.append("Be extra gentle and supportive; avoid pressure.")
         elif avg_n < 3.5: signals.append("User is resilient; open to challenging questions.")
         
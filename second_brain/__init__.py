@@ -1,25 +1,160 @@
 # Second Brain: Tagging, Embeddings, Linking for Knowledge Graph
 # Provides auto-tagging, semantic similarity matching, and knowledge retrieval
 
+from __future__ import annotations
+
+import importlib
 import json
 import re
-from typing import List, Dict, Optional, Any, Tuple
-from dataclasses import dataclass
-from datetime import datetime
+from typing import List, Dict, Optional, Any, Tuple, TYPE_CHECKING
+from dataclasses import dataclass, replace
 import asyncio
-from collections import defaultdict
-
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
-
-from second_brain.ollama_adapter import OllamaAsyncAdapter
-from api.models import Entry, Tag, ItemTag, ItemEmbedding, ItemLink
+import hashlib
+import operator
+import random
+import threading
+import time
+import weakref
+from collections import OrderedDict, defaultdict, deque
+
+import numpy as np
+
+try:
+    # Much faster on long float arrays; installed alongside chromadb
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+from sqlalchemy import case, func, or_, literal_column, table, column, text, select, union, union_all, lambda_stmt
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import aliased
+
+from api.models import Entry, Tag, ItemTag, ItemEmbedding, ItemLink, generate_uuid
 from utils.telemetry import get_logger
+from utils.text_processing import count_tokens
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+    from second_brain.ollama_adapter import OllamaAsyncAdapter
+    from second_brain.ollama_adapter import OllamaAsyncAdapter as OllamaConnector
 
 logger = get_logger(__name__)
 
-# Maintain alias for backward compatibility
-OllamaConnector = OllamaAsyncAdapter
+# Anything that is not a word character, whitespace or hyphen
+_TAG_PUNCT_RE = re.compile(r'[^\w\s-]')
+
+# Keyword fallbacks used when the LLM can't tag an item; per category, labels
+# are listed in priority order
+_FALLBACK_RULES = {
+    "topic": [
+        ("work", ['work', 'job', 'career', 'office', 'boss']),
+        ("family", ['family', 'parent', 'child', 'mother', 'father']),
+        ("health", ['health', 'exercise', 'sleep', 'doctor']),
+        ("goals", ['goal', 'plan', 'future', 'dream']),
+    ],
+    "intent": [
+        ("seeking guidance", ['help', 'advice', 'what should', 'how do']),
+        ("venting frustration", ['angry', 'frustrated', 'upset', 'annoyed']),
+        ("celebrating joy", ['happy', 'excited', 'celebrate', 'grateful']),
+    ],
+    "emotion": [
+        ("anxiety", ['anxious', 'worried', 'stress', 'nervous']),
+        ("gratitude", ['grateful', 'thankful', 'blessed']),
+        ("sadness", ['sad', 'depressed', 'lonely', 'grief']),
+        ("hope", ['hope', 'optimistic', 'better']),
+    ],
+}
+
+
+def _build_fallback_index():
+    """keyword -> [(category, rank, label)], plus one pattern matching any keyword."""
+    index = defaultdict(list)
+    for category, rules in _FALLBACK_RULES.items():
+        for rank, (label, words) in enumerate(rules):
+            for word in words:
+                index[word].append((category, rank, label))
+    alternation = "|".join(re.escape(w) for w in sorted(index, key=len, reverse=True))
+    return dict(index), re.compile(f"(?=({alternation}))")
+
+
+_FALLBACK_KEYWORDS, _FALLBACK_KEYWORD_RE = _build_fallback_index()
+
+# Interned shared-tag tuples: related items overwhelmingly repeat the same
+# handful of tag sets, so results share one tuple per distinct set
+_TAG_TUPLE_CACHE: Dict[frozenset, Tuple[str, ...]] = {}
+_TAG_TUPLE_CACHE_MAX = 4096
+
+# Embedding columns for similarity search (EmbeddingManager.unpack's
+# arguments); the JSON payload is only fetched for legacy rows without a blob
+_EMBEDDING_COLUMNS = (
+    ItemEmbedding.embedding_blob,
+    case((ItemEmbedding.embedding_blob.is_(None), ItemEmbedding.embedding_json), else_=None),
+    ItemEmbedding.embedding_norm,
+    ItemEmbedding.embedding_scale,
+)
+
+_BY_RELEVANCE = operator.attrgetter("relevance_score")
+
+# Trigram full-text index over tag names (created by api.database.init_tag_fts)
+_TAG_FTS = table("tag_fts", column("rowid"))
+
+
+# Hot lookups as lambda statements: SQLAlchemy caches them by code location,
+# so only the item id is re-bound per call instead of rebuilding the query
+def _linked_items_stmt(item_id: str):
+    """Links touching item_id from either direction, as (connected_id, type, weight, explanation)."""
+    return lambda_stmt(lambda: union_all(
+        select(
+            ItemLink.target_item_id.label('connected_id'),
+            ItemLink.link_type,
+            ItemLink.weight,
+            ItemLink.explanation
+        ).where(ItemLink.source_item_id == item_id),
+        select(
+            ItemLink.source_item_id.label('connected_id'),
+            ItemLink.link_type,
+            ItemLink.weight,
+            ItemLink.explanation
+        ).where(ItemLink.target_item_id == item_id)
+    ))
+
+
+def _semantic_neighbors_stmt(item_id: str):
+    """Ids already joined to item_id by a semantic link."""
+    return lambda_stmt(lambda: union(
+        select(ItemLink.target_item_id).where(
+            ItemLink.source_item_id == item_id,
+            ItemLink.link_type == "semantic"
+        ),
+        select(ItemLink.source_item_id).where(
+            ItemLink.target_item_id == item_id,
+            ItemLink.link_type == "semantic"
+        )
+    ))
+
+
+# Re-exports resolved on first attribute access (PEP 562). The classes here only
+# use the adapter in annotations, so importing the package doesn't need it.
+_LAZY_EXPORTS = {
+    "OllamaAsyncAdapter": ("second_brain.ollama_adapter", "OllamaAsyncAdapter"),
+    # Maintain alias for backward compatibility
+    "OllamaConnector": ("second_brain.ollama_adapter", "OllamaAsyncAdapter"),
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_EXPORTS:
+        module_name, attr = _LAZY_EXPORTS[name]
+        value = getattr(importlib.import_module(module_name), attr)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _ollama_circuit_open() -> bool:
+    """Whether the shared Ollama circuit breaker is open. Imported on use, like the re-exports above."""
+    from second_brain.ollama_adapter import OLLAMA_BREAKER
+    return OLLAMA_BREAKER.is_open()
 
 # Public API exports
 __all__ = [
@@ -28,6 +163,8 @@ __all__ = [
     "GeneratedTag",
     "EmbeddingManager",
     "LinkBuilder",
+    "CandidateMatrix",
+    "TagCentroidCache",
     "SecondBrainRetriever",
     "SecondBrainService",
     "SecondBrainBackgroundProcessor",
@@ -36,21 +173,19 @@ __all__ = [
     "OllamaAsyncAdapter",
 ]
 
-logger = get_logger(__name__)
-
 
 # =============================================================================
 # DATA CLASSES
 # =============================================================================
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class GeneratedTag:
     """Represents a generated tag with category hints."""
     tag: str
     category: str  # 'topic' | 'intent' | 'emotion'
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ItemLinkData:
     """Data structure for a knowledge graph link."""
     source_id: str
@@ -60,7 +195,7 @@ class ItemLinkData:
     explanation: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RelatedItem:
     """A related item returned from second brain retrieval."""
     item_id: str
@@ -68,10 +203,28 @@ class RelatedItem:
     content_preview: str  # First ~150 chars
     relevance_score: float
     connection_type: str  # 'shared_tag' | 'semantic_similarity' | 'both'
-    shared_tags: List[str]
+    shared_tags: Tuple[str, ...]
     explanation: str
 
 
+def _intern_tags(tags) -> Tuple[str, ...]:
+    """Returns a shared, sorted tuple for the given tag names."""
+    if not tags:
+        return ()
+    key = frozenset(tags)
+    cached = _TAG_TUPLE_CACHE.get(key)
+    if cached is None:
+        if len(_TAG_TUPLE_CACHE) >= _TAG_TUPLE_CACHE_MAX:
+            _TAG_TUPLE_CACHE.clear()
+        cached = _TAG_TUPLE_CACHE.setdefault(key, tuple(sorted(key)))
+    return cached
+
+
+def _content_hash(content: str) -> bytes:
+    """16-byte digest of item text, stored with its embedding."""
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).digest()
+
+
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
@@ -116,13 +269,9 @@ class TagNormalizer:
         - Strip whitespace
         - Limit to 3 words
         """
-        # Lowercase and remove punctuation except spaces and hyphens
-        cleaned = re.sub(r'[^\w\s-]', '', tag.lower())
-        # Normalize whitespace
-        cleaned = ' '.join(cleaned.split())
-        # Limit to first 3 words
-        words = cleaned.split()[:3]
-        return ' '.join(words)
+        # Lowercase, remove punctuation except spaces and hyphens, then keep
+        # the first 3 words (split() also collapses whitespace)
+        return ' '.join(_TAG_PUNCT_RE.sub('', tag.lower()).split()[:3])
 
     @staticmethod
     def is_valid(tag: str) -> bool:
@@ -139,6 +288,28 @@ class TagNormalizer:
         return True
 
 
+# Ollama serializes requests; bound how many tag prompts queue up at once
+OLLAMA_MAX_INFLIGHT = 4
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 4.0
+
+# asyncio primitives bind to one loop, so keep a semaphore per running loop
+_OLLAMA_SEMAPHORES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _ollama_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    sem = _OLLAMA_SEMAPHORES.get(loop)
+    if sem is None:
+        sem = _OLLAMA_SEMAPHORES[loop] = asyncio.Semaphore(OLLAMA_MAX_INFLIGHT)
+    return sem
+
+
+def _retry_delay(attempt: int) -> float:
+    """Capped exponential backoff with jitter so retries don't arrive in lockstep."""
+    return min(RETRY_BASE_SECONDS * 2 ** attempt, RETRY_MAX_SECONDS) * (0.5 + random.random())
+
+
 class TagGenerator:
     """Generates exactly 3 tags for content using local LLM."""
 
@@ -151,6 +322,11 @@ class TagGenerator:
         Generate exactly 3 tags for the content.
         Returns list of GeneratedTag dataclass.
         """
+        tags = await self.generate_llm_tags(content, max_retries)
+        return tags if tags is not None else self._fallback_tags(content)
+
+    async def generate_llm_tags(self, content: str, max_retries: int = 2) -> Optional[List[GeneratedTag]]:
+        """Like generate_tags, but None instead of keyword fallbacks when the LLM fails."""
         # Truncate very long content for prompt efficiency
         truncated = content[:2000] if len(content) > 2000 else content
 
@@ -158,13 +334,14 @@ class TagGenerator:
 
         for attempt in range(max_retries + 1):
             try:
-                response = await self.ollama.generate(
-                    prompt=prompt,
-                    model=self.model_name,
-                    system="You are a precise tagging system. Always output valid JSON with exactly 3 tags.",
-                    temperature=0.3,
-                    max_tokens=150
-                )
+                async with _ollama_semaphore():
+                    response = await self.ollama.generate(
+                        prompt=prompt,
+                        model=self.model_name,
+                        system="You are a precise tagging system. Always output valid JSON with exactly 3 tags.",
+                        temperature=0.3,
+                        max_tokens=150
+                    )
 
                 tags = self._parse_tag_response(response.get('response', ''))
 
@@ -178,12 +355,11 @@ class TagGenerator:
 
             except Exception as e:
                 logger.warning(f"Tag generation attempt {attempt + 1} failed: {e}")
-                if attempt == max_retries:
+                if attempt == max_retries or _ollama_circuit_open():
                     break
-                await asyncio.sleep(0.5)
+                await asyncio.sleep(_retry_delay(attempt))
 
-        # Fallback: Generate basic tags
-        return self._fallback_tags(content)
+        return None
 
     def _parse_tag_response(self, response: str) -> List[GeneratedTag]:
         """Parse JSON response from LLM into GeneratedTag list."""
@@ -214,34 +390,18 @@ class TagGenerator:
         """Generate basic fallback tags when LLM fails."""
         content_lower = content.lower()
 
-        # Simple keyword-based fallbacks
-        topic = "personal reflection"
-        if any(w in content_lower for w in ['work', 'job', 'career', 'office', 'boss']):
-            topic = "work"
-        elif any(w in content_lower for w in ['family', 'parent', 'child', 'mother', 'father']):
-            topic = "family"
-        elif any(w in content_lower for w in ['health', 'exercise', 'sleep', 'doctor']):
-            topic = "health"
-        elif any(w in content_lower for w in ['goal', 'plan', 'future', 'dream']):
-            topic = "goals"
-
-        intent = "processing thoughts"
-        if any(w in content_lower for w in ['help', 'advice', 'what should', 'how do']):
-            intent = "seeking guidance"
-        elif any(w in content_lower for w in ['angry', 'frustrated', 'upset', 'annoyed']):
-            intent = "venting frustration"
-        elif any(w in content_lower for w in ['happy', 'excited', 'celebrate', 'grateful']):
-            intent = "celebrating joy"
-
-        emotion = "contemplation"
-        if any(w in content_lower for w in ['anxious', 'worried', 'stress', 'nervous']):
-            emotion = "anxiety"
-        elif any(w in content_lower for w in ['grateful', 'thankful', 'blessed']):
-            emotion = "gratitude"
-        elif any(w in content_lower for w in ['sad', 'depressed', 'lonely', 'grief']):
-            emotion = "sadness"
-        elif any(w in content_lower for w in ['hope', 'optimistic', 'better']):
-            emotion = "hope"
+        # Single scan over the content; the lookahead lets overlapping
+        # keywords all register, then each category keeps its highest-priority label
+        found = {m.group(1) for m in _FALLBACK_KEYWORD_RE.finditer(content_lower)}
+        best = {}
+        for keyword in found:
+            for category, rank, label in _FALLBACK_KEYWORDS[keyword]:
+                if category not in best or rank < best[category][0]:
+                    best[category] = (rank, label)
+
+        topic = best["topic"][1] if "topic" in best else "personal reflection"
+        intent = best["intent"][1] if "intent" in best else "processing thoughts"
+        emotion = best["emotion"][1] if "emotion" in best else "contemplation"
 
         return [
             GeneratedTag(tag=topic, category="topic"),
@@ -253,15 +413,75 @@ class TagGenerator:
 class EmbeddingManager:
     """Manages embeddings for semantic similarity."""
 
+    # Truncate for embedding model context window
+    MAX_CONTENT_CHARS = 3000
+
+    # Concurrent generate_embedding calls arriving within this window are
+    # coalesced into one batch request
+    BATCH_WINDOW_SECONDS = 0.01
+    MAX_BATCH = 32
+    # Retrieval queries are latency-sensitive, so they wait less for company
+    QUERY_BATCH_WINDOW_SECONDS = 0.005
+
+    # Retrieval query embeddings (unit float32), shared by every instance:
+    # (embed_model, query_text) -> (vector, monotonic ns stamp), LRU first
+    QUERY_CACHE_SIZE = 256
+    QUERY_CACHE_TTL_SECONDS = 600
+    _query_cache: "OrderedDict[Tuple[str, str], Tuple[np.ndarray, int]]" = OrderedDict()
+    _query_cache_lock = threading.Lock()
+
     def __init__(self, ollama: OllamaConnector, embed_model: str = "mxbai-embed-large:latest"):
         self.ollama = ollama
         self.embed_model = embed_model
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle = None
+        self._inflight = set()
+        # query_text -> task embedding it, so identical concurrent queries share one
+        self._query_inflight: Dict[str, asyncio.Future] = {}
 
-    async def generate_embedding(self, content: str) -> Optional[List[float]]:
-        """Generate embedding vector for content."""
+    async def generate_embedding(self, content: str, window: Optional[float] = None) -> Optional[List[float]]:
+        """
+        Generate embedding vector for content. Calls made concurrently (e.g.
+        from a parallel batch) share a single request to the model.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((content, future))
+
+        if len(self._pending) >= self.MAX_BATCH:
+            self._flush()
+        elif self._flush_handle is None:
+            delay = self.BATCH_WINDOW_SECONDS if window is None else window
+            self._flush_handle = loop.call_later(delay, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Sends everything collected so far as one request."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        if len(batch) == 1:
+            results = [await self.embed_now(batch[0][0])]
+        else:
+            results = await self.generate_embeddings([content for content, _ in batch])
+
+        for (_, future), embedding in zip(batch, results):
+            if not future.done():
+                future.set_result(embedding)
+
+    async def embed_now(self, content: str) -> Optional[List[float]]:
+        """Embeds one text immediately, bypassing the batching window."""
         try:
-            # Truncate for embedding model context window
-            truncated = content[:3000] if len(content) > 3000 else content
+            truncated = content[:self.MAX_CONTENT_CHARS]
 
             response = await self.ollama.embeddings(
                 model=self.embed_model,
@@ -277,20 +497,476 @@ class EmbeddingManager:
 
         return None
 
+    async def embed_query(self, query_text: str) -> Optional[np.ndarray]:
+        """
+        Unit-normalized embedding of a retrieval query, cached for repeat
+        queries. Only for queries; ingested content goes through
+        generate_embedding.
+        """
+        # A cancelled caller must not cancel the request other callers wait on
+        return await asyncio.shield(self.start_query(query_text))
+
+    def start_query(self, query_text: str) -> "asyncio.Future[Optional[np.ndarray]]":
+        """
+        Starts embedding a retrieval query and returns a future for the unit
+        vector (await it shielded; it may be shared). The request goes out on
+        the loop's next step, so a caller that yields once overlaps it with
+        blocking work. A miss is sent at once when no other query is in
+        flight; misses arriving while one is are batched into one request,
+        and identical ones share it.
+        """
+        key = (self.embed_model, query_text)
+        ttl_ns = self.QUERY_CACHE_TTL_SECONDS * 1_000_000_000
+        with self._query_cache_lock:
+            hit = self._query_cache.get(key)
+            if hit is not None:
+                if time.monotonic_ns() - hit[1] < ttl_ns:
+                    self._query_cache.move_to_end(key)
+                    done = asyncio.get_running_loop().create_future()
+                    done.set_result(hit[0])
+                    return done
+                del self._query_cache[key]
+
+        task = self._query_inflight.get(query_text)
+        if task is None:
+            batched = bool(self._query_inflight)
+            task = asyncio.ensure_future(self._embed_query_uncached(key, query_text, batched))
+            self._query_inflight[query_text] = task
+            task.add_done_callback(lambda _: self._query_inflight.pop(query_text, None))
+        return task
+
+    async def _embed_query_uncached(self, key: Tuple[str, str], query_text: str, batched: bool) -> Optional[np.ndarray]:
+        if batched:
+            embedding = await self.generate_embedding(query_text, window=self.QUERY_BATCH_WINDOW_SECONDS)
+        else:
+            embedding = await self.embed_now(query_text)
+        if not embedding:
+            return None
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        if vec.ndim != 1 or norm == 0:
+            return None
+        vec /= norm
+        vec.setflags(write=False)
+
+        with self._query_cache_lock:
+            self._query_cache[key] = (vec, time.monotonic_ns())
+            self._query_cache.move_to_end(key)
+            while len(self._query_cache) > self.QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return vec
+
+    async def generate_embeddings(self, contents: List[str]) -> List[Optional[List[float]]]:
+        """
+        Embed several items with one request. Positions that could not be
+        embedded are None, so callers can fall back to generate_embedding.
+        """
+        if not contents:
+            return []
+        try:
+            response = await self.ollama.embeddings_batch(
+                model=self.embed_model,
+                prompts=[c[:self.MAX_CONTENT_CHARS] for c in contents]
+            )
+            embeddings = response.get('embeddings')
+            if isinstance(embeddings, list) and len(embeddings) == len(contents):
+                return [e if e and isinstance(e, list) else None for e in embeddings]
+
+        except Exception as e:
+            logger.error(f"Batch embedding generation failed: {e}")
+
+        return [None] * len(contents)
+
     @staticmethod
-    def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
+    def cosine_similarity(vec1, vec2) -> float:
         """Calculate cosine similarity between two vectors."""
-        if len(vec1) != len(vec2):
+        v1 = np.asarray(vec1, dtype=np.float32)
+        v2 = np.asarray(vec2, dtype=np.float32)
+        if v1.shape != v2.shape:
             return 0.0
 
-        dot_product = sum(a * b for a, b in zip(vec1, vec2))
-        norm1 = sum(a * a for a in vec1) ** 0.5
-        norm2 = sum(a * a for a in vec2) ** 0.5
-
-        if norm1 == 0 or norm2 == 0:
+        norm = float(np.linalg.norm(v1)) * float(np.linalg.norm(v2))
+        if norm == 0:
             return 0.0
 
-        return dot_product / (norm1 * norm2)
+        return float(np.dot(v1, v2)) / norm
+
+    @staticmethod
+    def cosine_similarities(query_vector, vectors, norms=None) -> np.ndarray:
+        """
+        Cosine similarity of one query against many same-length vectors,
+        computed as a single matrix-vector product. Zero vectors score 0.
+        `norms` may carry precomputed L2 norms of `vectors`.
+        """
+        q = np.asarray(query_vector, dtype=np.float32)
+        m = np.asarray(vectors, dtype=np.float32)
+        if m.ndim != 2 or m.shape[0] == 0 or m.shape[1] != q.shape[0]:
+            return np.zeros(len(vectors), dtype=np.float32)
+
+        if norms is None:
+            norms = np.linalg.norm(m, axis=1)
+        norms = np.asarray(norms, dtype=np.float32) * np.linalg.norm(q)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(norms > 0, (m @ q) / norms, 0.0)
+
+
+    @staticmethod
+    def pack(embedding: List[float]) -> Tuple[bytes, float]:
+        """Float32 little-endian bytes and L2 norm."""
+        vec = np.asarray(embedding, dtype='<f4')
+        return vec.tobytes(), float(np.linalg.norm(vec))
+
+    @classmethod
+    def pack_int8(cls, embedding: List[float]) -> Tuple[bytes, float, float]:
+        """Int8 codes, scale and L2 norm of the original vector, as stored on ItemEmbedding."""
+        vec = np.asarray(embedding, dtype=np.float32)
+        q8, scales = cls.quantize(vec[None, :])
+        return q8[0].tobytes(), float(scales[0]), float(np.linalg.norm(vec))
+
+    @staticmethod
+    def quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Symmetric per-row int8 quantization: returns (int8 rows, float32 scales)
+        with rows ~= q8 * scale. All-zero rows get scale 0.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        safe = np.where(scales > 0, scales, 1.0)
+        q8 = np.round(vectors / safe[:, None]).astype(np.int8)
+        return q8, scales.astype(np.float32)
+
+    @staticmethod
+    def unpack(
+        embedding_blob: Optional[bytes],
+        embedding_json: Any,
+        embedding_norm: Optional[float] = None,
+        embedding_scale: Optional[float] = None
+    ):
+        """
+        Returns (vector, norm) for a stored embedding, preferring the packed
+        blob (int8 if it has a scale, float32 otherwise) and falling back to
+        JSON for legacy rows init_db hasn't converted.
+        (None, None) if the row can't be decoded.
+        """
+        if embedding_blob and embedding_scale is not None:
+            vec = np.frombuffer(embedding_blob, dtype=np.int8).astype(np.float32) * np.float32(embedding_scale)
+        elif embedding_blob:
+            vec = np.frombuffer(embedding_blob, dtype='<f4')
+        else:
+            try:
+                vec = np.asarray(_json_loads(embedding_json), dtype=np.float32)
+            except (json.JSONDecodeError, TypeError, ValueError):
+                return None, None
+            if vec.ndim != 1 or vec.size == 0:
+                return None, None
+        if embedding_norm is None:
+            embedding_norm = float(np.linalg.norm(vec))
+        return vec, embedding_norm
+
+
+class CandidateMatrix:
+    """
+    In-process copy of every stored embedding as contiguous, unit-normalized
+    matrices (one per dimension), so a similarity search is a single
+    matrix-vector product instead of a per-row decode. Rows are kept as int8
+    with a per-row scale (a quarter of the float32 footprint) and dequantized
+    block by block while scoring.
+
+    Rows are appended incrementally using the SQLite rowid as a watermark.
+    A changed row count (deletes) or an explicit invalidate() (updates in
+    place) triggers a full rebuild. One instance is kept per engine.
+
+    Past IVF_MIN_ROWS rows a dimension also gets a coarse inverted-file
+    index (spherical k-means over ~sqrt(N) lists): a query scores the list
+    centroids and only scans the rows of the IVF_NPROBE closest lists.
+    """
+
+    _instances = weakref.WeakKeyDictionary()
+    _instances_lock = threading.Lock()
+    _ROWID = literal_column("item_embeddings.rowid")
+
+    # Rows dequantized per step while scoring, bounding the float32 scratch space
+    SCORE_BLOCK_ROWS = 4096
+
+    # Rows streamed from the DB (and quantized) per step while loading
+    FETCH_BATCH_ROWS = 512
+
+    # Exact scans are cheap below this; above it, probe an IVF index
+    IVF_MIN_ROWS = 10000
+    IVF_NPROBE = 16
+    IVF_TRAIN_ITERATIONS = 8
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dirty = True
+        self._count = 0
+        self._last_rowid = 0
+        # dim -> (ids array, (N, dim) int8 matrix, (N,) row scales)
+        self._by_dim: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        # dim -> (unit centroids, (N,) list assignment, rows at training time)
+        self._ivf: Dict[int, Tuple[np.ndarray, np.ndarray, int]] = {}
+
+    @classmethod
+    def for_session(cls, db) -> "CandidateMatrix":
+        """Shared matrix for the engine behind a session."""
+        bind = db.get_bind()
+        with cls._instances_lock:
+            matrix = cls._instances.get(bind)
+            if matrix is None:
+                matrix = cls._instances[bind] = cls()
+            return matrix
+
+    def invalidate(self):
+        """Forces a rebuild on next use (e.g. after an embedding is overwritten)."""
+        with self._lock:
+            self._dirty = True
+
+    def _fetch(self, db, after_rowid: int):
+        """Streams rows past the watermark instead of materializing them all."""
+        return (
+            db.query(ItemEmbedding.item_id, self._ROWID, *_EMBEDDING_COLUMNS)
+            .filter(self._ROWID > after_rowid)
+            .order_by(self._ROWID)
+            .yield_per(self.FETCH_BATCH_ROWS)
+        )
+
+    def _append(self, rows) -> int:
+        """
+        Decodes and quantizes rows one fetch batch at a time, so only the
+        int8 copy of the whole set is ever held. Returns the number of rows seen.
+        """
+        # dim -> lists of per-batch (ids, int8 rows, scales)
+        parts: Dict[int, Tuple[list, list, list]] = {}
+        seen = 0
+        batch = []
+
+        def flush():
+            grouped: Dict[int, Tuple[list, list]] = {}
+            for item_id, vector, norm in batch:
+                ids, vecs = grouped.setdefault(vector.shape[0], ([], []))
+                ids.append(item_id)
+                vecs.append(vector / norm if norm else vector)
+            for dim, (ids, vecs) in grouped.items():
+                q8, scales = EmbeddingManager.quantize(np.vstack(vecs))
+                dim_ids, dim_rows, dim_scales = parts.setdefault(dim, ([], [], []))
+                dim_ids.append(np.array(ids, dtype=object))
+                dim_rows.append(q8)
+                dim_scales.append(scales)
+            batch.clear()
+
+        for item_id, rowid, *stored in rows:
+            seen += 1
+            self._last_rowid = max(self._last_rowid, rowid)
+            vector, norm = EmbeddingManager.unpack(*stored)
+            if vector is None:
+                continue
+            batch.append((item_id, vector, norm))
+            if len(batch) >= self.FETCH_BATCH_ROWS:
+                flush()
+        flush()
+
+        for dim, (id_parts, row_parts, scale_parts) in parts.items():
+            new_ids = np.concatenate(id_parts)
+            new_rows = np.vstack(row_parts)
+            new_scales = np.concatenate(scale_parts)
+            appended = len(new_ids)
+            if dim in self._by_dim:
+                old_ids, old_rows, old_scales = self._by_dim[dim]
+                new_ids = np.concatenate([old_ids, new_ids])
+                new_rows = np.vstack([old_rows, new_rows])
+                new_scales = np.concatenate([old_scales, new_scales])
+            self._by_dim[dim] = (new_ids, new_rows, new_scales)
+            self._update_ivf(dim, appended)
+        return seen
+
+    def _scores(self, rows: np.ndarray, scales: np.ndarray, q: np.ndarray) -> np.ndarray:
+        """Dequantized rows @ q, block by block."""
+        sims = np.empty(rows.shape[0], dtype=np.float32)
+        for start in range(0, rows.shape[0], self.SCORE_BLOCK_ROWS):
+            block = slice(start, start + self.SCORE_BLOCK_ROWS)
+            sims[block] = (rows[block].astype(np.float32) @ q) * scales[block]
+        return sims
+
+    def _assign(self, rows: np.ndarray, scales: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Closest centroid for each row."""
+        assign = np.empty(rows.shape[0], dtype=np.int32)
+        for start in range(0, rows.shape[0], self.SCORE_BLOCK_ROWS):
+            block = slice(start, start + self.SCORE_BLOCK_ROWS)
+            dense = rows[block].astype(np.float32) * scales[block, None]
+            assign[block] = np.argmax(dense @ centroids.T, axis=1)
+        return assign
+
+    def _update_ivf(self, dim: int, appended: int):
+        """(Re)trains the IVF index once the row count passes the threshold or doubles."""
+        _, rows, scales = self._by_dim[dim]
+        n = rows.shape[0]
+        if n < self.IVF_MIN_ROWS:
+            self._ivf.pop(dim, None)
+            return
+
+        ivf = self._ivf.get(dim)
+        if ivf is not None and n < 2 * ivf[2]:
+            # Assign only the new rows to the existing lists
+            centroids, assign, trained_rows = ivf
+            fresh = self._assign(rows[n - appended:], scales[n - appended:], centroids)
+            self._ivf[dim] = (centroids, np.concatenate([assign, fresh]), trained_rows)
+            return
+
+        # Spherical k-means on a sample, then assign every row
+        nlist = int(np.sqrt(n))
+        rng = np.random.default_rng(0)
+        sample = rng.choice(n, size=min(n, nlist * 64), replace=False)
+        data = rows[sample].astype(np.float32) * scales[sample, None]
+        centroids = data[rng.choice(len(data), size=nlist, replace=False)]
+        for _ in range(self.IVF_TRAIN_ITERATIONS):
+            labels = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, data)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty lists keep their previous centroid
+            centroids = np.where(norms > 0, sums / np.where(norms > 0, norms, 1.0), centroids)
+        self._ivf[dim] = (centroids, self._assign(rows, scales, centroids), n)
+
+    def refresh(self, db):
+        """Brings the matrix in line with the item_embeddings table."""
+        stats = db.query(func.count(ItemEmbedding.id), func.max(self._ROWID)).first()
+        if not stats:
+            return
+        count, max_rowid = stats[0] or 0, stats[1] or 0
+        with self._lock:
+            if not self._dirty and count == self._count and max_rowid == self._last_rowid:
+                return
+            if not self._dirty:
+                appended = self._append(self._fetch(db, self._last_rowid))
+                if self._count + appended == count:
+                    self._count = count
+                    return
+            # Deletions or in-place updates: start over
+            self._by_dim = {}
+            self._ivf = {}
+            self._last_rowid = 0
+            self._append(self._fetch(db, 0))
+            self._count = count
+            self._dirty = False
+
+    def ranked(self, query_vector, threshold: float, exclude=(), limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """(item_id, similarity) above threshold, best first, at most `limit` of them."""
+        q = np.asarray(query_vector, dtype=np.float32)
+        q_norm = float(np.linalg.norm(q))
+        with self._lock:
+            entry = self._by_dim.get(q.shape[0])
+            ivf = self._ivf.get(q.shape[0])
+        if entry is None or q_norm == 0:
+            return []
+
+        ids, rows, scales = entry
+        q = q / q_norm
+        if ivf is None:
+            candidates = None
+            sims = self._scores(rows, scales, q)
+        else:
+            centroids, assign, _ = ivf
+            probe = np.argpartition(-(centroids @ q), min(self.IVF_NPROBE, len(centroids)) - 1)[:self.IVF_NPROBE]
+            candidates = np.nonzero(np.isin(assign, probe))[0]
+            sims = self._scores(rows[candidates], scales[candidates], q)
+        hits = np.nonzero(sims > threshold)[0]
+        if limit is not None:
+            # O(N) selection of the candidates that can make the cut (allowing
+            # for excluded ids), so only those get sorted
+            k = limit + len(exclude)
+            if k < len(hits):
+                hits = hits[np.argpartition(-sims[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-sims[hits], kind='stable')]
+        rows_idx = hits if candidates is None else candidates[hits]
+        ranked = [(ids[r], float(sims[h])) for h, r in zip(hits, rows_idx) if ids[r] not in exclude]
+        return ranked if limit is None else ranked[:limit]
+
+
+class TagCentroidCache:
+    """
+    Tags of recently tagged items, indexed by their unit-normalized embedding.
+    Journaling produces many near-duplicate entries; a new item close enough
+    to a cached one reuses its tags instead of another LLM call. One matrix
+    per embedding model, shared across service instances, FIFO-evicted.
+    """
+
+    _instances: Dict[str, "TagCentroidCache"] = {}
+    _instances_lock = threading.Lock()
+
+    # Outcomes of recent lookups; while most of them miss, callers start tag
+    # generation before the lookup can tell (see likely_miss)
+    HIT_RATE_WINDOW = 32
+    HIT_RATE_MIN_SAMPLES = 8
+    SPECULATE_BELOW_HIT_RATE = 0.5
+
+    def __init__(self, maxlen: int = 512, threshold: float = 0.9):
+        self.maxlen = maxlen
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._vecs: Optional[np.ndarray] = None
+        self._tags: List[Optional[List[GeneratedTag]]] = [None] * maxlen
+        self._next = 0
+        self._count = 0
+        self._recent_hits: deque = deque(maxlen=self.HIT_RATE_WINDOW)
+
+    @classmethod
+    def for_model(cls, embed_model: str) -> "TagCentroidCache":
+        with cls._instances_lock:
+            cache = cls._instances.get(embed_model)
+            if cache is None:
+                cache = cls._instances[embed_model] = cls()
+            return cache
+
+    @staticmethod
+    def normalize(embedding) -> Optional[np.ndarray]:
+        """Unit float32 vector for lookup()/add(); None if unusable."""
+        if not embedding:
+            return None
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if vec.ndim == 1 and norm > 0 else None
+
+    def likely_miss(self) -> bool:
+        """
+        True when the next lookup will probably miss: the cache is empty, or
+        most recent lookups (once there are enough of them) missed.
+        """
+        with self._lock:
+            if self._count == 0:
+                return True
+            samples = len(self._recent_hits)
+            return (
+                samples >= self.HIT_RATE_MIN_SAMPLES
+                and sum(self._recent_hits) < self.SPECULATE_BELOW_HIT_RATE * samples
+            )
+
+    def lookup(self, q: Optional[np.ndarray]) -> Optional[List[GeneratedTag]]:
+        """Tags of the closest cached item above the threshold, if any (q from normalize())."""
+        if q is None:
+            return None
+        with self._lock:
+            tags = None
+            if self._vecs is not None and self._count and q.shape[0] == self._vecs.shape[1]:
+                sims = self._vecs[:self._count] @ q
+                best = int(np.argmax(sims))
+                if sims[best] >= self.threshold:
+                    tags = self._tags[best]
+            self._recent_hits.append(tags is not None)
+        return tags
+
+    def add(self, q: Optional[np.ndarray], tags: List[GeneratedTag]):
+        """Caches tags under a unit vector from normalize()."""
+        if q is None:
+            return
+        with self._lock:
+            if self._vecs is None or self._vecs.shape[1] != q.shape[0]:
+                self._vecs = np.zeros((self.maxlen, q.shape[0]), dtype=np.float32)
+                self._next = 0
+                self._count = 0
+            self._vecs[self._next] = q
+            self._tags[self._next] = list(tags)
+            self._next = (self._next + 1) % self.maxlen
+            self._count = min(self._count + 1, self.maxlen)
 
 
 class LinkBuilder:
@@ -321,39 +997,28 @@ class LinkBuilder:
 
     async def _build_tag_links(self, item_id: str) -> List[ItemLinkData]:
         """Find items sharing tags with the source item."""
-        # Get item's tags
-        item_tags = (
-            self.db.query(Tag.name, Tag.id)
-            .join(ItemTag, ItemTag.tag_id == Tag.id)
-            .filter(ItemTag.item_id == item_id)
-            .all()
-        )
-
-        if not item_tags:
-            return []
-
-        tag_names = [t[0] for t in item_tags]
-        tag_ids = [t[1] for t in item_tags]
-
-        # Find other items with same tags
-        related_items = (
-            self.db.query(
-                ItemTag.item_id,
-                func.count(ItemTag.tag_id).label('shared_count'),
-                func.group_concat(Tag.name).label('shared_tags')
-            )
-            .join(Tag, Tag.id == ItemTag.tag_id)
+        # Other items carrying any of this item's tags, one row per shared tag
+        source = aliased(ItemTag)
+        other = aliased(ItemTag)
+        rows = (
+            self.db.query(other.item_id, Tag.name)
+            .join(source, source.tag_id == other.tag_id)
+            .join(Tag, Tag.id == other.tag_id)
             .filter(
-                ItemTag.tag_id.in_(tag_ids),
-                ItemTag.item_id != item_id
+                source.item_id == item_id,
+                other.item_id != item_id
             )
-            .group_by(ItemTag.item_id)
+            .order_by(other.item_id)
             .all()
         )
 
+        related_items = defaultdict(list)
+        for rel_item_id, name in rows:
+            related_items[rel_item_id].append(name)
+
         links = []
-        for rel_item_id, shared_count, shared_tags_str in related_items:
-            shared_tags = shared_tags_str.split(',') if shared_tags_str else []
+        for rel_item_id, shared_tags in related_items.items():
+            shared_count = len(shared_tags)
 
             # Weight based on number of shared tags (normalized)
             weight = min(shared_count / 3.0, 1.0)
@@ -377,7 +1042,7 @@ class LinkBuilder:
         """
         # Get source embedding
         source_emb = (
-            self.db.query(ItemEmbedding)
+            self.db.query(*_EMBEDDING_COLUMNS)
             .filter(ItemEmbedding.item_id == item_id)
             .first()
         )
@@ -385,61 +1050,34 @@ class LinkBuilder:
         if not source_emb:
             return []
 
-        source_vector = json.loads(source_emb.embedding_json)
-
-        # Get candidates (items with embeddings, excluding self and existing semantic links)
-        existing_targets = (
-            self.db.query(ItemLink.target_item_id)
-            .filter(
-                ItemLink.source_item_id == item_id,
-                ItemLink.link_type == "semantic"
-            )
-            .union(
-                self.db.query(ItemLink.source_item_id)
-                .filter(
-                    ItemLink.target_item_id == item_id,
-                    ItemLink.link_type == "semantic"
-                )
-            )
-            .subquery()
-        )
-
-        candidates = (
-            self.db.query(
-                ItemEmbedding.item_id,
-                ItemEmbedding.embedding_json,
-                Entry.text
-            )
-            .join(Entry, Entry.id == ItemEmbedding.item_id)
-            .filter(
-                ItemEmbedding.item_id != item_id,
-                ~ItemEmbedding.item_id.in_(existing_targets.select())
-            )
-            .all()
-        )
-
-        if not candidates:
+        source_vector, _ = self.embedding_manager.unpack(*source_emb)
+        if source_vector is None:
             return []
 
-        # Calculate similarities
-        similarities = []
-        for cand_id, cand_emb_json, cand_text in candidates:
-            try:
-                cand_vector = json.loads(cand_emb_json)
-                similarity = self.embedding_manager.cosine_similarity(source_vector, cand_vector)
-
-                # Only consider reasonably similar items
-                if similarity > 0.5:
-                    similarities.append((cand_id, similarity, cand_text))
-            except (json.JSONDecodeError, TypeError):
-                continue
+        # Exclude self and existing semantic links
+        existing_targets = self.db.execute(_semantic_neighbors_stmt(item_id)).all()
+        exclude = {row[0] for row in existing_targets}
+        exclude.add(item_id)
+
+        # Score every stored embedding at once; only reasonably similar items
+        matrix = CandidateMatrix.for_session(self.db)
+        matrix.refresh(self.db)
+        # Embeddings can outlive their entry, so take some spare candidates
+        top = matrix.ranked(source_vector, threshold=0.5, exclude=exclude, limit=max_links * 2)
+        if not top:
+            return []
 
-        # Sort by similarity descending
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        live_ids = {
+            row[0] for row in
+            self.db.query(Entry.id).filter(Entry.id.in_([cand_id for cand_id, _ in top])).all()
+        }
 
-        # Take top N
         links = []
-        for cand_id, similarity, cand_text in similarities[:max_links]:
+        for cand_id, similarity in top:
+            if cand_id not in live_ids:
+                continue
+            if len(links) >= max_links:
+                break
             weight = round(min(similarity, 1.0), 3)
 
             # Generate brief explanation
@@ -481,25 +1119,29 @@ class SecondBrainRetriever:
                 "token_estimate": int
             }
         """
-        # Generate query embedding
-        query_embedding = await self.embedding_manager.generate_embedding(query_text)
-
-        # Find related items via multiple strategies
-        related_items = []
+        # Start the query embedding first: the request runs in the adapter's
+        # worker thread while the DB-only strategies run here (they share the
+        # session, which isn't thread-safe, so they stay on this thread).
+        # The one yield lets the embedding task send its request before the
+        # blocking queries below; if they raise, it still finishes and caches
+        embedding_future = self.embedding_manager.start_query(query_text)
+        await asyncio.sleep(0)
 
         # Strategy 1: Items linked to current item (if provided)
-        if current_item_id:
-            linked_items = self._get_linked_items(current_item_id)
-            related_items.extend(linked_items)
+        linked_items = self._get_linked_items(current_item_id) if current_item_id else []
+
+        # Strategy 3: Items with tag overlap to query keywords
+        keyword_items = self._get_keyword_matches(query_text, current_item_id)
+
+        query_embedding = await asyncio.shield(embedding_future)
 
         # Strategy 2: Items matching query semantically (if embedding worked)
-        if query_embedding:
+        semantic_items = []
+        if query_embedding is not None:
             semantic_items = await self._get_semantic_matches(query_embedding, current_item_id, limit=top_k)
-            related_items.extend(semantic_items)
 
-        # Strategy 3: Items with tag overlap to query keywords
-        keyword_items = self._get_keyword_matches(query_text, current_item_id)
-        related_items.extend(keyword_items)
+        # Find related items via multiple strategies
+        related_items = linked_items + semantic_items + keyword_items
 
         # Deduplicate and score
         deduplicated = self._deduplicate_and_score(related_items)
@@ -523,27 +1165,7 @@ class SecondBrainRetriever:
     def _get_linked_items(self, item_id: str) -> List[RelatedItem]:
         """Get items directly linked to the given item."""
         # Query from both directions
-        links = (
-            self.db.query(
-                ItemLink.target_item_id.label('connected_id'),
-                ItemLink.link_type,
-                ItemLink.weight,
-                ItemLink.explanation
-            )
-            .filter(ItemLink.source_item_id == item_id)
-            .all()
-        )
-
-        links += (
-            self.db.query(
-                ItemLink.source_item_id.label('connected_id'),
-                ItemLink.link_type,
-                ItemLink.weight,
-                ItemLink.explanation
-            )
-            .filter(ItemLink.target_item_id == item_id)
-            .all()
-        )
+        links = self.db.execute(_linked_items_stmt(item_id)).all()
 
         if not links:
             return []
@@ -557,14 +1179,16 @@ class SecondBrainRetriever:
         )
         entry_map = {e.id: e for e in entries}
 
-        # Get shared tags for each
+        # Shared tags for all connected items in one query
+        shared_by_item = self._get_shared_tags(item_id, connected_ids)
+
         related = []
         for link in links:
             entry = entry_map.get(link.connected_id)
             if not entry:
                 continue
 
-            shared_tags = self._get_shared_tags(item_id, link.connected_id)
+            shared_tags = shared_by_item.get(link.connected_id, ())
 
             related.append(RelatedItem(
                 item_id=link.connected_id,
@@ -572,7 +1196,7 @@ class SecondBrainRetriever:
                 content_preview=entry.text[:150] + "..." if len(entry.text) > 150 else entry.text,
                 relevance_score=link.weight,
                 connection_type=link.link_type,
-                shared_tags=shared_tags,
+                shared_tags=_intern_tags(shared_tags),
                 explanation=link.explanation or "Connected in knowledge graph"
             ))
 
@@ -580,47 +1204,43 @@ class SecondBrainRetriever:
 
     async def _get_semantic_matches(
         self,
-        query_vector: List[float],
+        query_vector: np.ndarray,
         exclude_item_id: Optional[str],
         limit: int = 5
     ) -> List[RelatedItem]:
         """Find semantically similar items using cosine similarity."""
-        candidates = (
-            self.db.query(ItemEmbedding, Entry)
-            .join(Entry, Entry.id == ItemEmbedding.item_id)
-            .filter(
-                ItemEmbedding.item_id != exclude_item_id if exclude_item_id else True,
-                ItemEmbedding.embedding_json.isnot(None)
-            )
-            .all()
-        )
-
-        if not candidates:
+        matrix = CandidateMatrix.for_session(self.db)
+        matrix.refresh(self.db)
+        exclude = (exclude_item_id,) if exclude_item_id else ()
+        # Threshold for relevance; spare candidates in case an entry is gone
+        top = matrix.ranked(query_vector, threshold=0.6, exclude=exclude, limit=limit * 2)
+        if not top:
             return []
 
+        # Only load entries (and tags) for the items that make the cut
+        entry_map = {
+            e.id: e for e in
+            self.db.query(Entry).filter(Entry.id.in_([item_id for item_id, _ in top])).all()
+        }
+
+        hits = [(entry_map[item_id], similarity) for item_id, similarity in top if item_id in entry_map][:limit]
+        tags_by_item = self._get_tags_for_items([entry.id for entry, _ in hits])
+
         scored = []
-        for emb, entry in candidates:
-            try:
-                vector = json.loads(emb.embedding_json)
-                similarity = self.embedding_manager.cosine_similarity(query_vector, vector)
-
-                if similarity > 0.6:  # Threshold for relevance
-                    shared_tags = self._get_item_tags(entry.id)
-
-                    scored.append(RelatedItem(
-                        item_id=entry.id,
-                        item_type=entry.feature_type,
-                        content_preview=entry.text[:150] + "..." if len(entry.text) > 150 else entry.text,
-                        relevance_score=round(similarity, 3),
-                        connection_type="semantic_similarity",
-                        shared_tags=shared_tags,
-                        explanation=f"{int(similarity * 100)}% semantic similarity to query"
-                    ))
-            except (json.JSONDecodeError, TypeError):
-                continue
+        for entry, similarity in hits:
+            shared_tags = tags_by_item.get(entry.id, ())
+
+            scored.append(RelatedItem(
+                item_id=entry.id,
+                item_type=entry.feature_type,
+                content_preview=entry.text[:150] + "..." if len(entry.text) > 150 else entry.text,
+                relevance_score=round(similarity, 3),
+                connection_type="semantic_similarity",
+                shared_tags=_intern_tags(shared_tags),
+                explanation=f"{int(similarity * 100)}% semantic similarity to query"
+            ))
 
-        scored.sort(key=lambda x: x.relevance_score, reverse=True)
-        return scored[:limit]
+        return scored
 
     def _get_keyword_matches(self, query_text: str, exclude_item_id: Optional[str]) -> List[RelatedItem]:
         """Find items with tag overlap to query keywords."""
@@ -630,126 +1250,116 @@ class SecondBrainRetriever:
         if not keywords:
             return []
 
-        # Find tags matching keywords
-        matching_tags = (
-            self.db.query(Tag.id, Tag.name)
-            .filter(
-                or_(*[Tag.name.ilike(f"%{kw}%") for kw in keywords])
-            )
-            .all()
-        )
-
-        if not matching_tags:
-            return []
-
-        tag_ids = [t[0] for t in matching_tags]
-
-        # Find items with those tags
-        items_with_tags = (
-            self.db.query(
-                ItemTag.item_id,
-                func.count(ItemTag.tag_id).label('match_count'),
-                func.group_concat(Tag.name).label('matched_tags')
-            )
-            .join(Tag, Tag.id == ItemTag.tag_id)
-            .filter(
-                ItemTag.tag_id.in_(tag_ids),
-                ItemTag.item_id != exclude_item_id if exclude_item_id else True
-            )
-            .group_by(ItemTag.item_id)
-            .having(func.count(ItemTag.tag_id) >= 1)
-            .all()
-        )
+        try:
+            items_with_tags = self._query_keyword_matches(keywords, exclude_item_id, use_fts=True)
+        except OperationalError:
+            # No tag_fts table (init_db not run, or SQLite without FTS5 trigram)
+            items_with_tags = self._query_keyword_matches(keywords, exclude_item_id, use_fts=False)
 
-        if not items_with_tags:
-            return []
-
-        # Get entry details
-        item_ids = [i[0] for i in items_with_tags]
-        entries = (
-            self.db.query(Entry)
-            .filter(Entry.id.in_(item_ids))
-            .all()
-        )
-        entry_map = {e.id: e for e in entries}
+        # One row per matched tag; group per item keeping first-seen order
+        matches: Dict[str, Tuple[List[str], str, str]] = {}
+        for item_id, tag_name, feature_type, entry_text in items_with_tags:
+            matches.setdefault(item_id, ([], feature_type, entry_text))[0].append(tag_name)
 
         related = []
-        for item_id, match_count, matched_tags in items_with_tags:
-            entry = entry_map.get(item_id)
-            if not entry:
-                continue
-
+        for item_id, (matched_tags, feature_type, entry_text) in matches.items():
+            match_count = len(matched_tags)
             weight = min(match_count / 2.0, 0.9)
 
             related.append(RelatedItem(
                 item_id=item_id,
-                item_type=entry.feature_type,
-                content_preview=entry.text[:150] + "..." if len(entry.text) > 150 else entry.text,
+                item_type=feature_type,
+                content_preview=entry_text[:150] + "..." if len(entry_text) > 150 else entry_text,
                 relevance_score=round(weight, 3),
                 connection_type="shared_tag",
-                shared_tags=matched_tags.split(',') if matched_tags else [],
+                shared_tags=_intern_tags(matched_tags),
                 explanation=f"Matches {match_count} query keyword{'s' if match_count > 1 else ''}"
             ))
 
         return related
 
-    def _get_shared_tags(self, item1_id: str, item2_id: str) -> List[str]:
-        """Get tags shared between two items."""
-        tags1 = (
-            self.db.query(Tag.name)
-            .join(ItemTag, ItemTag.tag_id == Tag.id)
-            .filter(ItemTag.item_id == item1_id)
-            .all()
+    def _query_keyword_matches(self, keywords: List[str], exclude_item_id: Optional[str], use_fts: bool):
+        """
+        One round-trip: (item_id, tag name, feature type, text) for every
+        item tag matching any keyword.
+        """
+        query = (
+            self.db.query(
+                ItemTag.item_id,
+                Tag.name,
+                Entry.feature_type,
+                Entry.text
+            )
+            .join(Tag, Tag.id == ItemTag.tag_id)
+            .join(Entry, Entry.id == ItemTag.item_id)
         )
-        tags2 = (
-            self.db.query(Tag.name)
-            .join(ItemTag, ItemTag.tag_id == Tag.id)
-            .filter(ItemTag.item_id == item2_id)
+        if use_fts:
+            match = " OR ".join('"' + kw.replace('"', '""') + '"' for kw in keywords)
+            query = (
+                query.join(_TAG_FTS, _TAG_FTS.c.rowid == literal_column("tags.rowid"))
+                .filter(text("tag_fts MATCH :match").bindparams(match=match))
+            )
+        else:
+            query = query.filter(or_(*[Tag.name.ilike(f"%{kw}%") for kw in keywords]))
+
+        return (
+            query.filter(ItemTag.item_id != exclude_item_id if exclude_item_id else True)
+            .order_by(ItemTag.item_id)
             .all()
         )
 
-        set1 = set(t[0] for t in tags1)
-        set2 = set(t[0] for t in tags2)
-
-        return list(set1 & set2)
+    def _get_shared_tags(self, item_id: str, other_ids: List[str]) -> Dict[str, List[str]]:
+        """Get the tags each of `other_ids` shares with `item_id`."""
+        source = aliased(ItemTag)
+        other = aliased(ItemTag)
+        rows = (
+            self.db.query(other.item_id, Tag.name)
+            .join(source, source.tag_id == other.tag_id)
+            .join(Tag, Tag.id == other.tag_id)
+            .filter(
+                source.item_id == item_id,
+                other.item_id.in_(other_ids)
+            )
+            .all()
+        )
 
-    def _get_item_tags(self, item_id: str) -> List[str]:
-        """Get all tags for an item."""
-        tags = (
-            self.db.query(Tag.name)
-            .join(ItemTag, ItemTag.tag_id == Tag.id)
-            .filter(ItemTag.item_id == item_id)
+        shared = defaultdict(list)
+        for other_id, name in rows:
+            shared[other_id].append(name)
+        return shared
+
+    def _get_tags_for_items(self, item_ids: List[str]) -> Dict[str, List[str]]:
+        """Get all tags for several items in one query."""
+        if not item_ids:
+            return {}
+        rows = (
+            self.db.query(ItemTag.item_id, Tag.name)
+            .join(Tag, Tag.id == ItemTag.tag_id)
+            .filter(ItemTag.item_id.in_(item_ids))
             .all()
         )
-        return [t[0] for t in tags]
+        tags = defaultdict(list)
+        for item_id, name in rows:
+            tags[item_id].append(name)
+        return tags
 
     def _deduplicate_and_score(self, items: List[RelatedItem]) -> List[RelatedItem]:
         """Deduplicate items, keeping highest relevance score."""
-        seen = {}
+        seen: Dict[str, RelatedItem] = {}
         for item in items:
-            if item.item_id in seen:
-                existing = seen[item.item_id]
-                
-                # Determine merged connection type
-                new_type = existing.connection_type
-                if item.connection_type != existing.connection_type:
-                    new_type = "both"
-                elif item.connection_type == "both" or existing.connection_type == "both":
-                    new_type = "both"
-                
-                # Update if new item has higher score
-                if item.relevance_score > existing.relevance_score:
-                    seen[item.item_id] = item
-                    item.connection_type = new_type
-                else:
-                    existing.connection_type = new_type
-                    
-            else:
+            existing = seen.get(item.item_id)
+            if existing is None:
                 seen[item.item_id] = item
+                continue
 
-        result = list(seen.values())
-        result.sort(key=lambda x: x.relevance_score, reverse=True)
-        return result
+            # Found by different strategies -> "both"
+            new_type = existing.connection_type if item.connection_type == existing.connection_type else "both"
+
+            # Keep the higher-scoring item (items are frozen, so copy only if the type changes)
+            kept = item if item.relevance_score > existing.relevance_score else existing
+            seen[item.item_id] = kept if kept.connection_type == new_type else replace(kept, connection_type=new_type)
+
+        return sorted(seen.values(), key=_BY_RELEVANCE, reverse=True)
 
     def _group_by_themes(self, items: List[RelatedItem]) -> Dict[str, List[str]]:
         """Group items by shared themes/tags."""
@@ -777,10 +1387,8 @@ class SecondBrainRetriever:
         used_tokens = 10  # Approximate overhead
 
         for item in items[:6]:  # Max 6 items in context
-            # Estimate tokens (rough: 4 chars ~= 1 token)
-            preview = item.content_preview[:100]
-            item_text = f"\n- [{item.item_type}] {preview}"
-            item_tokens = len(item_text) // 4
+            item_text = f"\n- [{item.item_type}] {item.content_preview[:100]}"
+            item_tokens = count_tokens(item_text)
 
             if used_tokens + item_tokens > token_budget:
                 break
@@ -794,8 +1402,8 @@ class SecondBrainRetriever:
         return "".join(parts)
 
     def _estimate_tokens(self, text: str) -> int:
-        """Rough token estimation."""
-        return len(text) // 4
+        """Approximate token count (see count_tokens)."""
+        return count_tokens(text)
 
     def _item_to_dict(self, item: RelatedItem) -> Dict[str, Any]:
         """Convert RelatedItem to dict for JSON serialization."""
@@ -805,7 +1413,7 @@ class SecondBrainRetriever:
             "content_preview": item.content_preview,
             "relevance_score": item.relevance_score,
             "connection_type": item.connection_type,
-            "shared_tags": item.shared_tags,
+            "shared_tags": list(item.shared_tags),
             "explanation": item.explanation
         }
 
@@ -820,16 +1428,25 @@ class SecondBrainService:
     Handles: tagging, embedding, linking, and retrieval.
     """
 
-    def __init__(self, db: Session, ollama: OllamaConnector, embed_model: str = "mxbai-embed-large:latest", chat_model: Optional[str] = None):
+    def __init__(
+        self,
+        db: Session,
+        ollama: OllamaConnector,
+        embed_model: str = "mxbai-embed-large:latest",
+        chat_model: Optional[str] = None,
+        embedding_manager: Optional[EmbeddingManager] = None
+    ):
         self.db = db
         self.ollama = ollama
         self.embed_model = embed_model
         self.chat_model = chat_model
 
         self.tag_generator = TagGenerator(ollama, chat_model)
-        self.embedding_manager = EmbeddingManager(ollama, embed_model)
+        # A long-lived manager can be passed in so its batching window spans requests
+        self.embedding_manager = embedding_manager or EmbeddingManager(ollama, embed_model)
         self.link_builder = LinkBuilder(db, self.embedding_manager, ollama)
         self.retriever = SecondBrainRetriever(db, self.embedding_manager)
+        self.tag_cache = TagCentroidCache.for_model(embed_model)
 
     async def process_new_item(
         self,
@@ -837,10 +1454,14 @@ class SecondBrainService:
         content: str,
         item_type: str = "note",
         skip_embedding: bool = False,
-        skip_linking: bool = False
+        skip_linking: bool = False,
+        embedding: Optional[List[float]] = None,
+        clear_links: bool = False
     ) -> Dict[str, Any]:
         """
         Process a new item through the full Second Brain pipeline.
+        `embedding` may be precomputed by a batched caller; otherwise it is generated here.
+        `clear_links` drops the item's existing links in the same transaction.
         Returns processing results for logging/metrics.
         """
         result = {
@@ -851,109 +1472,153 @@ class SecondBrainService:
             "errors": []
         }
 
+        if _ollama_circuit_open() and not (skip_embedding or embedding):
+            # Ollama is down: fail fast and leave the item for a later retry
+            result["errors"].append("ollama_unavailable")
+            return result
+
+        tags_task = None
+        # All writes go into one transaction, committed once at the end. Every
+        # await comes before the first write, so the SQLite write lock isn't
+        # held across LLM calls.
         try:
-            # Step 1: Generate and store tags
-            tags = await self.tag_generator.generate_tags(content)
+            # Step 1: Generate embedding (first, so near-duplicates can reuse tags).
+            # While the tag cache is mostly missing, tag generation runs
+            # alongside it (and is cancelled if the lookup hits after all).
+            if not skip_embedding and embedding is None:
+                if self.tag_cache.likely_miss():
+                    tags_task = asyncio.ensure_future(self.tag_generator.generate_llm_tags(content))
+                embedding = await self.embedding_manager.generate_embedding(content)
+            # Normalized once for both the lookup and the insert
+            unit = TagCentroidCache.normalize(embedding) if not skip_embedding else None
+
+            # Step 2: Generate and store tags
+            tags = self.tag_cache.lookup(unit)
+            if tags is not None:
+                if tags_task is not None:
+                    tags_task.cancel()
+            else:
+                tags = await (tags_task or self.tag_generator.generate_llm_tags(content))
+                if tags is not None:
+                    self.tag_cache.add(unit, tags)
+                else:
+                    # Keyword fallbacks aren't cached: near-duplicates should
+                    # get another LLM attempt rather than inherit them
+                    tags = self.tag_generator._fallback_tags(content)
+
+            if clear_links:
+                self._clear_links(item_id)
             self._store_tags(item_id, tags)
             result["tags_created"] = len(tags)
 
-            # Step 2: Generate and store embedding
+            # Step 3: Store embedding
             if not skip_embedding:
-                embedding = await self.embedding_manager.generate_embedding(content)
                 if embedding:
-                    self._store_embedding(item_id, embedding)
+                    self._store_embedding(item_id, embedding, _content_hash(content))
                     result["embedding_updated"] = True
                 else:
                     result["errors"].append("embedding_generation_failed")
 
-            # Step 3: Build knowledge graph links
+            # Step 4: Build knowledge graph links (DB reads only, against the
+            # rows flushed above)
             if not skip_linking:
                 links = await self.link_builder.build_links_for_item(item_id)
                 self._store_links(links)
                 result["links_created"] = len(links)
 
+            self.db.commit()
             logger.info(f"Second Brain: processed item {item_id} with {result['tags_created']} tags, {result['links_created']} links")
 
         except Exception as e:
             logger.error(f"Second Brain processing failed for {item_id}: {e}")
+            self.db.rollback()
+            # The matrix may have loaded rows from the rolled-back transaction
+            CandidateMatrix.for_session(self.db).invalidate()
+            result.update(tags_created=0, embedding_updated=False, links_created=0)
             result["errors"].append(str(e))
+            if tags_task is not None:
+                tags_task.cancel()
 
         return result
 
     def _store_tags(self, item_id: str, tags: List[GeneratedTag]):
         """Store tags in database, normalizing and deduping."""
+        names = list(dict.fromkeys(TagNormalizer.normalize(t.tag) for t in tags))
+
         # Clear existing tags for this item
         self.db.query(ItemTag).filter(ItemTag.item_id == item_id).delete()
 
-        for generated_tag in tags:
-            normalized = TagNormalizer.normalize(generated_tag.tag)
-
-            # Get or create tag
-            tag = self.db.query(Tag).filter(Tag.name == normalized).first()
-            if not tag:
-                tag = Tag(name=normalized)
-                self.db.add(tag)
-                self.db.flush()  # Get ID
-
-            # Create association
-            association = ItemTag(item_id=item_id, tag_id=tag.id)
-            self.db.add(association)
-
-        self.db.commit()
-
-    def _store_embedding(self, item_id: str, embedding: List[float]):
-        """Store or update embedding for an item."""
-        existing = (
-            self.db.query(ItemEmbedding)
-            .filter(ItemEmbedding.item_id == item_id)
-            .first()
-        )
+        if names:
+            # Create missing tags in one statement; RETURNING hands back the ids
+            # of the new ones, so only tags that already existed are looked up
+            id_map = dict(self.db.execute(
+                sqlite_insert(Tag)
+                .on_conflict_do_nothing(index_elements=[Tag.name])
+                .returning(Tag.name, Tag.id),
+                [{"name": name} for name in names]
+            ).all())
+            existing = [name for name in names if name not in id_map]
+            if existing:
+                id_map.update(self.db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(existing))).all())
+            associations = [
+                {"item_id": item_id, "tag_id": id_map[name]} for name in names if name in id_map
+            ]
+            if associations:
+                self.db.execute(sqlite_insert(ItemTag), associations)
+
+    def _store_embedding(self, item_id: str, embedding: List[float], content_digest: Optional[bytes] = None):
+        """Store or update embedding for an item (content_digest from _content_hash())."""
+        # Int8 codes: a quarter of the float32 size, well within similarity tolerances
+        blob, scale, norm = EmbeddingManager.pack_int8(embedding)
+        values = {
+            "embedding_json": [],
+            "embedding_model": self.embed_model,
+            "embedding_dim": len(embedding),
+            "embedding_blob": blob,
+            "embedding_norm": norm,
+            "embedding_scale": scale,
+            "content_hash": content_digest,
+        }
 
-        if existing:
-            existing.embedding_json = json.dumps(embedding)
-            existing.embedding_model = self.embed_model
-            existing.embedding_dim = len(embedding)
-        else:
-            emb = ItemEmbedding(
-                item_id=item_id,
-                embedding_json=json.dumps(embedding),
-                embedding_model=self.embed_model,
-                embedding_dim=len(embedding)
-            )
-            self.db.add(emb)
+        # Core upsert: no ORM object or flush, visible to link building right away
+        new_id = generate_uuid()
+        stmt = sqlite_insert(ItemEmbedding).values(id=new_id, item_id=item_id, **values)
+        stored_id = self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ItemEmbedding.item_id],
+                set_={**values, "updated_at": func.now()}
+            ).returning(ItemEmbedding.id)
+        ).scalar_one()
 
-        self.db.commit()
+        if stored_id != new_id:
+            # Rewritten in place, so the rowid watermark won't see it
+            CandidateMatrix.for_session(self.db).invalidate()
 
     def _store_links(self, links: List[ItemLinkData]):
-        """Store knowledge graph links."""
-        for link in links:
-            # Check for existing link
-            existing = (
-                self.db.query(ItemLink)
-                .filter(
-                    ItemLink.source_item_id == link.source_id,
-                    ItemLink.target_item_id == link.target_id,
-                    ItemLink.link_type == link.link_type
-                )
-                .first()
+        """Store knowledge graph links, updating weight/explanation of existing ones."""
+        if links:
+            stmt = sqlite_insert(ItemLink)
+            self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[ItemLink.source_item_id, ItemLink.target_item_id, ItemLink.link_type],
+                    set_={
+                        "weight": stmt.excluded.weight,
+                        "explanation": stmt.excluded.explanation,
+                        "updated_at": func.now(),
+                    }
+                ),
+                [
+                    {
+                        "source_item_id": link.source_id,
+                        "target_item_id": link.target_id,
+                        "link_type": link.link_type,
+                        "weight": link.weight,
+                        "explanation": link.explanation,
+                    }
+                    for link in links
+                ]
             )
 
-            if existing:
-                # Update weight if changed
-                existing.weight = link.weight
-                existing.explanation = link.explanation
-            else:
-                link_obj = ItemLink(
-                    source_item_id=link.source_id,
-                    target_item_id=link.target_id,
-                    link_type=link.link_type,
-                    weight=link.weight,
-                    explanation=link.explanation
-                )
-                self.db.add(link_obj)
-
-        self.db.commit()
-
     async def get_context_for_query(
         self,
         query_text: str,
@@ -975,38 +1640,50 @@ class SecondBrainService:
         if not entry:
             return {"error": "Item not found"}
 
-        # Clear existing tags and links (keep embedding history)
-        self.db.query(ItemTag).filter(ItemTag.item_id == item_id).delete()
-        self.db.query(ItemLink).filter(
-            or_(
-                ItemLink.source_item_id == item_id,
-                ItemLink.target_item_id == item_id
-            )
-        ).delete()
-        self.db.commit()
+        # Same text embedded with the same model: tags, embedding and links are current
+        stored = (
+            self.db.query(ItemEmbedding.content_hash, ItemEmbedding.embedding_model)
+            .filter(ItemEmbedding.item_id == item_id)
+            .first()
+        )
+        if stored and stored[0] == _content_hash(entry.text) and stored[1] == self.embed_model:
+            return {
+                "item_id": item_id,
+                "tags_created": 0,
+                "embedding_updated": False,
+                "links_created": 0,
+                "errors": [],
+                "unchanged": True
+            }
 
-        # Re-process
+        # Re-process; existing tags and links are replaced in the same
+        # transaction (embedding is overwritten)
         return await self.process_new_item(
             item_id=item_id,
             content=entry.text,
             item_type=entry.feature_type,
             skip_embedding=False,
-            skip_linking=False
+            skip_linking=False,
+            clear_links=True
         )
 
+    def _clear_links(self, item_id: str):
+        """Deletes every link from or to the item (no commit)."""
+        # One delete per direction, so each can use its own index
+        self.db.query(ItemLink).filter(ItemLink.source_item_id == item_id).delete(synchronize_session=False)
+        self.db.query(ItemLink).filter(ItemLink.target_item_id == item_id).delete(synchronize_session=False)
+
     def delete_item(self, item_id: str):
         """Clean up all Second Brain data for a deleted item."""
         # Cascading deletes are set up in SQLAlchemy relationships,
         # but we ensure explicit cleanup for clarity
         self.db.query(ItemTag).filter(ItemTag.item_id == item_id).delete()
         self.db.query(ItemEmbedding).filter(ItemEmbedding.item_id == item_id).delete()
-        self.db.query(ItemLink).filter(
-            or_(
-                ItemLink.source_item_id == item_id,
-                ItemLink.target_item_id == item_id
-            )
-        ).delete()
+        self._clear_links(item_id)
         self.db.commit()
+        # SQLite hands a deleted max rowid to the next insert, which the
+        # (count, max rowid) check can't tell apart from no change
+        CandidateMatrix.for_session(self.db).invalidate()
 
         logger.info(f"Second Brain: cleaned up item {item_id}")
 
@@ -1045,15 +1722,21 @@ class SecondBrainBackgroundProcessor:
         finally:
             db.close()
 
-    async def batch_process(self, item_ids: List[str]) -> List[Dict[str, Any]]:
-        """Batch re-process multiple items (useful for migrations)."""
-        results = []
-        for item_id in item_ids:
-            db = self.db_factory()
-            try:
-                service = SecondBrainService(db, self.ollama, self.embed_model)
-                result = await service.reprocess_item(item_id)
-                results.append(result)
-            finally:
-                db.close()
-        return results
+    async def batch_process(self, item_ids: List[str], concurrency: int = OLLAMA_MAX_INFLIGHT) -> List[Dict[str, Any]]:
+        """
+        Batch re-process multiple items (useful for migrations), up to
+        `concurrency` at a time. Results are in the order of item_ids.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def _one(item_id: str) -> Dict[str, Any]:
+            # Each item gets its own session; DB work stays on the loop thread
+            async with semaphore:
+                db = self.db_factory()
+                try:
+                    service = SecondBrainService(db, self.ollama, self.embed_model)
+                    return await service.reprocess_item(item_id)
+                finally:
+                    db.close()
+
+        return list(await asyncio.gather(*(_one(item_id) for item_id in item_ids)))
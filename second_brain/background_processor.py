@@ -1,7 +1,7 @@
 """Second Brain background processor - integrates with orchestrator queues.
 
 Production-ready implementation with:
-- LRU caching with TTL for context retrieval
+- CLOCK-evicted caching with TTL for context retrieval
 - Structured observability (no PII)
 - Graceful degradation and restart behavior
 - Context quality guardrails
@@ -12,16 +12,22 @@ import concurrent.futures
 import threading
 import atexit
 import time
+import weakref
 import hashlib
-from typing import Dict, Any, Optional
+import functools
+from typing import Dict, Any, List, Optional
 from pathlib import Path
 import json
 
-from api.database import SessionLocal
+from sqlalchemy import func
+
+from api.database import ScopedSession, SessionLocal
+from api.models import Entry, ItemTag
 from connectors.ollama import OllamaClient
-from second_brain import SecondBrainService
-from second_brain.ollama_adapter import OllamaAsyncAdapter
+from second_brain import SecondBrainService, SecondBrainRetriever, EmbeddingManager
+from second_brain.ollama_adapter import get_ollama_async, OLLAMA_BREAKER
 from utils.telemetry import get_logger
+from utils.text_processing import truncate_to_tokens
 
 logger = get_logger(__name__)
 
@@ -32,6 +38,7 @@ logger = get_logger(__name__)
 
 CACHE_MAXSIZE = 100
 CACHE_TTL_SECONDS = 300
+CACHE_SHARDS = 16
 CONTEXT_TIMEOUT_SECONDS = 8  # Reduced from 10 for faster feedback
 BACKOFF_INITIAL_SECONDS = 1.0
 BACKOFF_MAX_SECONDS = 60.0
@@ -42,61 +49,96 @@ MAX_SUMMARY_TOKENS = 100  # For enforcing token budget
 
 
 # =============================================================================
-# LRU CACHE WITH TTL
+# CLOCK CACHE WITH TTL
 # =============================================================================
 
 class ContextCache:
-    """Thread-safe LRU cache with TTL for context retrieval results."""
+    """
+    Thread-safe cache with TTL for context retrieval results, evicted with
+    CLOCK (second chance) instead of strict LRU.
+    Reads take no lock: a hit only sets the slot's reference bit. Writes lock
+    one of several independent shards (each a ring holding its share of
+    maxsize) and advance that shard's hand past recently read slots.
+    """
     
-    def __init__(self, maxsize: int = CACHE_MAXSIZE, ttl_seconds: int = CACHE_TTL_SECONDS):
-        self._cache: Dict[str, tuple] = {}  # key -> (value, timestamp)
-        self._maxsize = maxsize
-        self._ttl = ttl_seconds
-        self._lock = threading.Lock()
-        self._access_times: Dict[str, float] = {}  # For LRU eviction
+    def __init__(self, maxsize: int = CACHE_MAXSIZE, ttl_seconds: int = CACHE_TTL_SECONDS, shards: int = CACHE_SHARDS):
+        self._num_shards = max(1, min(shards, maxsize))
+        self._shard_maxsize = -(-maxsize // self._num_shards)
+        self._ttl_ns = int(ttl_seconds * 1_000_000_000)
+        self._locks = [threading.Lock() for _ in range(self._num_shards)]
+        # Per shard: key -> slot index, ring of (key, value, expiry in monotonic ns),
+        # reference bits and the clock hand
+        self._index: List[Dict[tuple, int]] = [{} for _ in range(self._num_shards)]
+        self._slots: List[List[Optional[tuple]]] = [[None] * self._shard_maxsize for _ in range(self._num_shards)]
+        self._ref = [bytearray(self._shard_maxsize) for _ in range(self._num_shards)]
+        self._hands = [0] * self._num_shards
+    
+    def _make_key(self, query_text: str, token_budget: int) -> tuple:
+        """
+        Create cache key from query text and token budget. The cache is
+        in-process, so the tuple is used as-is; str caches its own hash.
+        """
+        return (query_text, token_budget)
     
-    def _make_key(self, query_text: str, token_budget: int) -> str:
-        """Create cache key from query text and token budget."""
-        key_content = f"{query_text}:{token_budget}"
-        return hashlib.sha256(key_content.encode()).hexdigest()[:32]
+    def _shard(self, key: tuple) -> int:
+        return hash(key) % self._num_shards
     
     def get(self, query_text: str, token_budget: int) -> Optional[str]:
-        """Get cached value if present and not expired."""
+        """Get cached value if present and not expired (lock-free)."""
         key = self._make_key(query_text, token_budget)
-        with self._lock:
-            if key in self._cache:
-                value, timestamp = self._cache[key]
-                if time.time() - timestamp < self._ttl:
-                    self._access_times[key] = time.time()
-                    return value
-                # Expired - remove it
-                del self._cache[key]
-                del self._access_times[key]
+        index = self._shard(key)
+        slot = self._index[index].get(key)
+        if slot is None:
+            return None
+        entry = self._slots[index][slot]
+        # The slot may have been reused by a concurrent set(); expired
+        # entries are left for the clock hand to reclaim
+        if entry is None or entry[0] != key or time.monotonic_ns() >= entry[2]:
             return None
+        self._ref[index][slot] = 1
+        return entry[1]
     
     def set(self, query_text: str, token_budget: int, value: str) -> None:
-        """Set cache value with LRU eviction if at capacity."""
+        """Set cache value, evicting with the clock hand if the shard is full."""
         key = self._make_key(query_text, token_budget)
-        with self._lock:
-            # Evict oldest if at capacity
-            if len(self._cache) >= self._maxsize and key not in self._cache:
-                oldest_key = min(self._access_times.keys(), key=lambda k: self._access_times[k])
-                del self._cache[oldest_key]
-                del self._access_times[oldest_key]
+        index = self._shard(key)
+        slots = self._slots[index]
+        ref = self._ref[index]
+        key_index = self._index[index]
+        now = time.monotonic_ns()
+        with self._locks[index]:
+            slot = key_index.get(key)
+            if slot is None:
+                hand = self._hands[index]
+                # Give recently read slots a second chance; empty or
+                # expired slots are taken straight away
+                while True:
+                    entry = slots[hand]
+                    if entry is None or now >= entry[2] or not ref[hand]:
+                        break
+                    ref[hand] = 0
+                    hand = (hand + 1) % self._shard_maxsize
+                if entry is not None:
+                    del key_index[entry[0]]
+                slot = hand
+                self._hands[index] = (hand + 1) % self._shard_maxsize
             
-            self._cache[key] = (value, time.time())
-            self._access_times[key] = time.time()
+            slots[slot] = (key, value, now + self._ttl_ns)
+            ref[slot] = 0
+            key_index[key] = slot
     
     def clear(self) -> None:
         """Clear all cached entries."""
-        with self._lock:
-            self._cache.clear()
-            self._access_times.clear()
+        for index, lock in enumerate(self._locks):
+            with lock:
+                self._index[index].clear()
+                self._slots[index][:] = [None] * self._shard_maxsize
+                self._ref[index][:] = bytes(self._shard_maxsize)
+                self._hands[index] = 0
     
     def size(self) -> int:
         """Return current cache size."""
-        with self._lock:
-            return len(self._cache)
+        return sum(len(key_index) for key_index in self._index)
 
 
 # =============================================================================
@@ -166,6 +208,7 @@ class SecondBrainMetrics:
                 "cache_hit": self.cache_hit,
                 "cache_miss": self.cache_miss,
                 "fallback_used": self.fallback_used,
+                "ollama_circuit_open": int(OLLAMA_BREAKER.is_open()),
                 "cache_size": 0  # Will be populated by caller if needed
             }
 
@@ -178,18 +221,14 @@ _metrics = SecondBrainMetrics()
 # UTILITY FUNCTIONS
 # =============================================================================
 
-def _is_in_async_context() -> bool:
-    """Check if we're currently running inside an async event loop."""
-    try:
-        loop = asyncio.get_running_loop()
-        return loop is not None
-    except RuntimeError:
-        return False
-
-
+@functools.lru_cache(maxsize=1024)
 def _hash_query(query_text: str) -> str:
-    """Create a short hash of query text for logging (no PII)."""
-    return hashlib.sha256(query_text.encode()).hexdigest()[:12]
+    """
+    Create a short hash of query text for logging (no PII), stable across processes.
+    Memoized: the lru lookup reuses the str's cached hash(), so repeated prompts
+    are not rescanned.
+    """
+    return hashlib.blake2b(query_text.encode(), digest_size=6).hexdigest()
 
 
 # =============================================================================
@@ -239,11 +278,13 @@ class SecondBrainWorker:
         self.chat_model = chat_model
         self._running = False
 
-    async def process_job(self, job_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process a single Second Brain job."""
+    async def process_job(self, job_data: Dict[str, Any], embedding: Optional[list] = None) -> Dict[str, Any]:
+        """Process a single Second Brain job (optionally with a precomputed embedding)."""
         task = SecondBrainTask.from_dict(job_data)
         if not task:
             return {"error": "Invalid job data"}
+        if OLLAMA_BREAKER.is_open():
+            return {"error": "ollama_unavailable", "item_id": task.item_id}
 
         db = SessionLocal()
         try:
@@ -257,7 +298,8 @@ class SecondBrainWorker:
             result = await service.process_new_item(
                 item_id=task.item_id,
                 content=task.content,
-                item_type=task.item_type
+                item_type=task.item_type,
+                embedding=embedding
             )
 
             logger.info(f"Second Brain Worker: processed {task.item_id} - {result['tags_created']} tags, {result['links_created']} links")
@@ -271,16 +313,118 @@ class SecondBrainWorker:
             db.close()
 
     async def run_batch(self, jobs: list) -> list:
-        """Process multiple jobs sequentially (for simplicity)."""
+        """
+        Process multiple jobs sequentially, with all embeddings fetched up front
+        in a single request instead of one round-trip per item.
+        """
+        contents = [job.get("content", "") if isinstance(job, dict) else "" for job in jobs]
+        embeddings = await EmbeddingManager(self.ollama, self.embed_model).generate_embeddings(contents)
+
         results = []
-        for job in jobs:
-            result = await self.process_job(job)
+        for job, embedding in zip(jobs, embeddings):
+            result = await self.process_job(job, embedding=embedding)
             results.append(result)
             # Brief pause between jobs to not overwhelm local resources
             await asyncio.sleep(0.1)
         return results
 
 
+# =============================================================================
+# SHARED BACKGROUND LOOP
+# =============================================================================
+
+class _BackgroundLoop:
+    """
+    Process-wide daemon thread running the event loop that synchronous
+    callers schedule Second Brain work on. Restarts the loop with
+    exponential backoff if it stops unexpectedly.
+    """
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.restart_count = 0
+        self.backoff_seconds = BACKOFF_INITIAL_SECONDS
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._shutdown_event = threading.Event()
+
+    def _run(self) -> None:
+        while not self._shutdown_event.is_set():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            self.loop = loop
+            loop.call_soon(self._ready.set)
+            try:
+                loop.run_forever()
+            except Exception as e:
+                logger.error(f"Background loop crashed: {e}")
+            finally:
+                self._ready.clear()
+                loop.close()
+
+            # If shutdown not requested, attempt restart with backoff
+            if not self._shutdown_event.is_set():
+                logger.warning(f"Background loop stopped unexpectedly, restarting in {self.backoff_seconds}s")
+                time.sleep(self.backoff_seconds)
+                self.backoff_seconds = min(self.backoff_seconds * BACKOFF_MULTIPLIER, BACKOFF_MAX_SECONDS)
+                self.restart_count += 1
+
+    def ensure_running(self) -> None:
+        """Starts the loop thread unless it is alive (running, or waiting out a restart backoff)."""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._thread is not None:
+                logger.warning("Second Brain background loop not running, attempting restart")
+            self._shutdown_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="SecondBrainContextLoop")
+            self._thread.start()
+            logger.debug("Second Brain context background loop started")
+
+    def submit(self, coro, wait: float = 1.0) -> concurrent.futures.Future:
+        """Schedules a coroutine on the loop; raises RuntimeError if it is not up within `wait` seconds."""
+        self.ensure_running()
+        if not self._ready.is_set() and not self._ready.wait(wait):
+            coro.close()
+            raise RuntimeError("Second Brain background loop not running")
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            # Blocking on the result from the loop's own thread would deadlock
+            coro.close()
+            raise RuntimeError("Cannot wait on the Second Brain loop from within it")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._shutdown_event.set()
+            loop = self.loop
+            if loop is not None and self._ready.is_set():
+                # Schedule loop stop from within the loop
+                loop.call_soon_threadsafe(loop.stop)
+            if self._thread is not None and self._thread.is_alive():
+                self._thread.join(timeout=2.0)
+
+
+_background_loop: Optional[_BackgroundLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def _get_background_loop() -> _BackgroundLoop:
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = _BackgroundLoop()
+            atexit.register(_background_loop.shutdown)
+        return _background_loop
+
+
 # =============================================================================
 # CONTEXT INJECTOR (Production-ready)
 # =============================================================================
@@ -291,7 +435,7 @@ class SecondBrainContextInjector:
     Non-blocking: uses cached links, falls back gracefully.
     
     Production features:
-    - LRU cache with TTL for context retrieval
+    - CLOCK cache with TTL for context retrieval
     - Structured metrics (no PII)
     - Exponential backoff restart for background loop
     - Context quality guardrails (fallback if empty)
@@ -299,7 +443,7 @@ class SecondBrainContextInjector:
     - Thread-safe future handling
     
     Thread-safe async/sync boundary:
-    - Maintains a background thread with its own event loop
+    - Shares one process-wide background thread and event loop
     - get_context_sync() schedules work on the background loop
     - Never creates nested event loops
     """
@@ -308,96 +452,52 @@ class SecondBrainContextInjector:
         self.ollama = ollama_client
         self.embed_model = embed_model
         self._cache = ContextCache()
-        self._loop: Optional[asyncio.AbstractEventLoop] = None
-        self._thread: Optional[threading.Thread] = None
-        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-        self._lock = threading.Lock()
-        self._shutdown_event = threading.Event()
-        self._restart_count = 0
-        self._backoff_seconds = BACKOFF_INITIAL_SECONDS
+        self._db_session = ScopedSession
+        # One EmbeddingManager per event loop, so query embeddings from
+        # concurrent requests are batched into shared requests
+        self._query_embedders: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, EmbeddingManager]" = weakref.WeakKeyDictionary()
+        self._background = _get_background_loop()
         
         # Register atexit handler
         atexit.register(self.shutdown)
         
         # Start background loop
-        self._start_background_loop()
-
-    def _start_background_loop(self) -> None:
-        """Start a daemon thread with a dedicated event loop and restart support."""
-        def run_loop():
-            self._loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self._loop)
-            
-            while not self._shutdown_event.is_set():
-                try:
-                    self._loop.run_forever()
-                except Exception as e:
-                    logger.error(f"Background loop crashed: {e}")
-                
-                # If shutdown not requested, attempt restart with backoff
-                if not self._shutdown_event.is_set():
-                    logger.warning(f"Background loop stopped unexpectedly, restarting in {self._backoff_seconds}s")
-                    time.sleep(self._backoff_seconds)
-                    self._backoff_seconds = min(
-                        self._backoff_seconds * BACKOFF_MULTIPLIER, 
-                        BACKOFF_MAX_SECONDS
-                    )
-                    self._restart_count += 1
-                    self._loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(self._loop)
-                
-        self._thread = threading.Thread(target=run_loop, daemon=True, name="SecondBrainContextLoop")
-        self._thread.start()
-        logger.debug("Second Brain context background loop started")
+        self._background.ensure_running()
 
     def shutdown(self) -> None:
-        """Clean up resources: stop background loop and executor."""
-        with self._lock:
-            self._shutdown_event.set()
-            
-            if self._loop and self._loop.is_running():
-                # Schedule loop stop from within the loop
-                self._loop.call_soon_threadsafe(self._loop.stop)
-            
-            if self._thread and self._thread.is_alive():
-                self._thread.join(timeout=2.0)
-            
-            self._executor.shutdown(wait=False)
-            self._cache.clear()
-            
-            logger.debug("Second Brain context injector shutdown complete")
+        """Clean up resources. The shared background loop is stopped at exit."""
+        self._cache.clear()
+        logger.debug("Second Brain context injector shutdown complete")
+
+    def _query_embedder(self) -> EmbeddingManager:
+        loop = asyncio.get_running_loop()
+        embedder = self._query_embedders.get(loop)
+        if embedder is None:
+            embedder = self._query_embedders[loop] = EmbeddingManager(self.ollama, self.embed_model)
+        return embedder
 
     def _get_fallback_context(self, current_item_id: Optional[str], count: int = 3) -> Dict[str, Any]:
         """Get fallback context: last N entries by created_at."""
-        db = SessionLocal()
+        db = self._db_session()
         try:
-            from api.models import Entry
-            
-            query = db.query(Entry).order_by(Entry.created_at.desc())
+            # Plain rows with only the preview prefix of the text: no ORM
+            # instances, and long entries are not loaded in full
+            query = db.query(
+                Entry.id, Entry.feature_type, func.substr(Entry.text, 1, 200)
+            ).order_by(Entry.created_at.desc())
             if current_item_id:
                 query = query.filter(Entry.id != current_item_id)
             
-            entries = query.limit(count).all()
+            previews = [(item_id, feature_type, text or "") for item_id, feature_type, text in query.limit(count)]
             
-            if not entries:
+            if not previews:
                 return {"summary": "", "items": []}
             
-            # Build simple summary
-            summaries = []
-            for entry in entries:
-                preview = entry.text[:200] if entry.text else ""
-                summaries.append(f"[{entry.feature_type}] {preview}")
-            
-            summary = "\n".join(summaries)
             return {
-                "summary": summary,
+                "summary": "\n".join(f"[{feature_type}] {preview}" for _, feature_type, preview in previews),
                 "items": [
-                    {
-                        "item_id": e.id,
-                        "item_type": e.feature_type,
-                        "preview": e.text[:150] if e.text else ""
-                    }
-                    for e in entries
+                    {"item_id": item_id, "item_type": feature_type, "preview": preview[:150]}
+                    for item_id, feature_type, preview in previews
                 ]
             }
         except Exception as e:
@@ -411,7 +511,8 @@ class SecondBrainContextInjector:
         query_text: str,
         current_item_id: Optional[str] = None,
         token_budget: int = 500,
-        top_k: int = 5
+        top_k: int = 5,
+        query_hash: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Get Second Brain context formatted for prompt injection.
@@ -423,7 +524,8 @@ class SecondBrainContextInjector:
         - Structured metrics (no PII)
         """
         start_time = time.time()
-        query_hash = _hash_query(query_text)
+        if query_hash is None:
+            query_hash = _hash_query(query_text)
         
         # Check cache first
         cached = self._cache.get(query_text, token_budget)
@@ -432,17 +534,15 @@ class SecondBrainContextInjector:
             _metrics.record("success", duration_ms, items_count=1, query_hash=query_hash, cache_hit=True)
             return {"summary": cached, "cached": True}
         
+        # Concurrent requests interleave on the loop thread across awaits,
+        # so each one keeps a private session rather than the thread's scoped one.
+        # Retrieval only needs a retriever over it; the long-lived state (query
+        # embedder and its cache) is shared per loop
         db = SessionLocal()
         try:
-            from second_brain import SecondBrainService
-
-            service = SecondBrainService(
-                db=db,
-                ollama=self.ollama,
-                embed_model=self.embed_model
-            )
+            retriever = SecondBrainRetriever(db, self._query_embedder())
 
-            context = await service.get_context_for_query(
+            context = await retriever.get_context(
                 query_text=query_text,
                 current_item_id=current_item_id,
                 top_k=top_k,
@@ -460,10 +560,8 @@ class SecondBrainContextInjector:
                     summary = fallback["summary"]
                     items_count = len(fallback["items"])
             
-            # Enforce token budget in summary (rough approximation: 4 chars ≈ 1 token)
-            max_chars = token_budget * 4
-            if len(summary) > max_chars:
-                summary = summary[:max_chars].rsplit('.', 1)[0] + '.'
+            # Enforce token budget in summary
+            summary = truncate_to_tokens(summary, token_budget)
             
             duration_ms = (time.time() - start_time) * 1000
             
@@ -514,8 +612,10 @@ class SecondBrainContextInjector:
         - Structured error returns
         
         Thread-safe implementation:
-        - If already in async context, uses async version directly
-        - Otherwise schedules work on background event loop
+        - Cache hits are answered on the calling thread
+        - Everything else is scheduled on the shared background event loop,
+          including calls from inside another running loop (waiting on that
+          loop from its own thread would deadlock)
         - Never creates nested event loops
         
         Returns dict with summary, timing metrics, and optional error field.
@@ -524,51 +624,33 @@ class SecondBrainContextInjector:
         query_hash = _hash_query(query_text)
         future = None
         
+        # The cache is safe to read from any thread, so hits skip the loop hop
+        cached = self._cache.get(query_text, token_budget)
+        if cached is not None:
+            total_ms = (time.time() - start_time) * 1000
+            _metrics.record("success", total_ms, items_count=1, query_hash=query_hash, cache_hit=True)
+            return {"summary": cached, "cached": True, "total_ms": round(total_ms, 2)}
+        
         try:
-            # Check if we're already in an async context
-            if _is_in_async_context():
-                try:
-                    loop = asyncio.get_running_loop()
-                    future = asyncio.run_coroutine_threadsafe(
-                        self.get_context_for_prompt(
-                            query_text=query_text,
-                            current_item_id=current_item_id,
-                            token_budget=token_budget,
-                            top_k=top_k
-                        ),
-                        loop
-                    )
-                    result = future.result(timeout=CONTEXT_TIMEOUT_SECONDS)
-                    total_ms = (time.time() - start_time) * 1000
-                    result["total_ms"] = round(total_ms, 2)
-                    return result
-                except RuntimeError:
-                    pass
-            
-            # Schedule on background loop via thread pool executor
-            with self._lock:
-                if not self._loop or not self._loop.is_running():
-                    logger.warning("Second Brain background loop not running, attempting restart")
-                    self._start_background_loop()
-                
-                future = asyncio.run_coroutine_threadsafe(
-                    self.get_context_for_prompt(
-                        query_text=query_text,
-                        current_item_id=current_item_id,
-                        token_budget=token_budget,
-                        top_k=top_k
-                    ),
-                    self._loop
+            # Schedule on the shared background loop
+            future = self._background.submit(
+                self.get_context_for_prompt(
+                    query_text=query_text,
+                    current_item_id=current_item_id,
+                    token_budget=token_budget,
+                    top_k=top_k,
+                    query_hash=query_hash
                 )
-                
-                result = future.result(timeout=CONTEXT_TIMEOUT_SECONDS)
-                total_ms = (time.time() - start_time) * 1000
-                result["total_ms"] = round(total_ms, 2)
-                
-                # Reset backoff on success
-                self._backoff_seconds = BACKOFF_INITIAL_SECONDS
-                
-                return result
+            )
+            
+            result = future.result(timeout=CONTEXT_TIMEOUT_SECONDS)
+            total_ms = (time.time() - start_time) * 1000
+            result["total_ms"] = round(total_ms, 2)
+            
+            # Reset backoff on success
+            self._background.backoff_seconds = BACKOFF_INITIAL_SECONDS
+            
+            return result
                 
         except concurrent.futures.TimeoutError:
             total_ms = (time.time() - start_time) * 1000
@@ -604,7 +686,7 @@ class SecondBrainContextInjector:
         """Get current metrics and cache stats."""
         stats = _metrics.get_stats()
         stats["cache_size"] = self._cache.size()
-        stats["restart_count"] = self._restart_count
+        stats["restart_count"] = self._background.restart_count
         return stats
 
 
@@ -642,19 +724,17 @@ def migrate_existing_entries(
     Process in batches to avoid overwhelming the system.
     Returns stats about the migration.
     """
-    from api.models import Entry, ItemTag
-
     db = SessionLocal()
     try:
-        # Find entries without tags
-        untagged_entries = (
-            db.query(Entry)
+        # Find entries without tags; rows are paged by id below rather than
+        # loaded at once, and only the columns a job needs are selected
+        untagged = (
+            db.query(Entry.id, Entry.text, Entry.feature_type)
             .outerjoin(ItemTag, ItemTag.item_id == Entry.id)
             .filter(ItemTag.item_id.is_(None))
-            .all()
         )
 
-        total = len(untagged_entries)
+        total = untagged.count()
         if total == 0:
             return {"processed": 0, "message": "No untagged entries found"}
 
@@ -663,10 +743,10 @@ def migrate_existing_entries(
         # Process in batches
         processed = 0
         errors = 0
+        worker = SecondBrainWorker(get_ollama_async(ollama_client), embed_model, chat_model)
 
         async def process_batch(batch):
             nonlocal processed, errors
-            worker = SecondBrainWorker(ollama_client, embed_model, chat_model)
 
             jobs = [
                 SecondBrainTask(e.id, e.text, e.feature_type).to_dict()
@@ -685,12 +765,24 @@ def migrate_existing_entries(
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
 
-        for i in range(0, len(untagged_entries), batch_size):
-            batch = untagged_entries[i:i + batch_size]
-            loop.run_until_complete(process_batch(batch))
-            logger.info(f"Second Brain migration: processed {min(i + batch_size, total)}/{total}")
-
-        loop.close()
+        seen = 0
+        last_id = None
+        try:
+            while True:
+                page = untagged.order_by(Entry.id)
+                if last_id is not None:
+                    page = page.filter(Entry.id > last_id)
+                batch = page.limit(batch_size).all()
+                # End the read transaction so no snapshot is held while the batch runs
+                db.rollback()
+                if not batch:
+                    break
+                last_id = batch[-1].id
+                loop.run_until_complete(process_batch(batch))
+                seen += len(batch)
+                logger.info(f"Second Brain migration: processed {min(seen, total)}/{total}")
+        finally:
+            loop.close()
 
         return {
             "processed": processed,
@@ -2,8 +2,54 @@
 # Adapts the sync OllamaClient to async interface used by Second Brain
 
 import asyncio
+import threading
+import time
+import weakref
 from typing import List, Dict, Any, Optional
 
+from utils.errors import OllamaUnreachableError, OllamaTimeoutError
+
+# Consecutive connection failures/timeouts that open the circuit, and how long
+# it stays open before calls are let through again
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_COOLDOWN_SECONDS = 30.0
+
+
+class OllamaCircuitBreaker:
+    """
+    Fails Ollama calls fast while the server is down. After `threshold`
+    consecutive connection failures or timeouts the circuit opens for
+    `cooldown` seconds; after that calls go through again (half-open), and a
+    single further failure re-opens it while a success closes it.
+    """
+
+    def __init__(self, threshold: int = BREAKER_FAILURE_THRESHOLD, cooldown: float = BREAKER_COOLDOWN_SECONDS):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None and time.monotonic() - self._opened_at < self.cooldown
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.threshold or self._opened_at is not None:
+                self._opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+
+# Shared by every adapter: there is one Ollama server behind all of them
+OLLAMA_BREAKER = OllamaCircuitBreaker()
+
+
 class OllamaAsyncAdapter:
     """
     Wraps the synchronous OllamaClient to provide async methods.
@@ -13,6 +59,19 @@ class OllamaAsyncAdapter:
     def __init__(self, ollama_client):
         self.client = ollama_client
 
+    async def _run(self, call):
+        """Runs a blocking client call in the thread pool, through the circuit breaker."""
+        if OLLAMA_BREAKER.is_open():
+            raise OllamaUnreachableError("Ollama circuit open; skipping call")
+        loop = asyncio.get_event_loop()
+        try:
+            result = await loop.run_in_executor(None, call)
+        except (OllamaUnreachableError, OllamaTimeoutError):
+            OLLAMA_BREAKER.record_failure()
+            raise
+        OLLAMA_BREAKER.record_success()
+        return result
+
     async def generate(
         self,
         prompt: str,
@@ -39,8 +98,7 @@ class OllamaAsyncAdapter:
             )
 
         # Run blocking call in thread pool
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(None, _call)
+        result = await self._run(_call)
 
         # Extract response text
         content = result.get("message", {}).get("content", "")
@@ -53,8 +111,15 @@ class OllamaAsyncAdapter:
             embedding = self.client.embed(model, prompt)
             return {"embedding": embedding}
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _call)
+        return await self._run(_call)
+
+    async def embeddings_batch(self, model: str, prompts: List[str]) -> Dict[str, Any]:
+        """Async wrapper for embedding several texts in one request."""
+
+        def _call():
+            return {"embeddings": self.client.embed_batch(model, prompts)}
+
+        return await self._run(_call)
 
     async def chat(
         self,
@@ -67,8 +132,23 @@ class OllamaAsyncAdapter:
         def _call():
             return self.client.chat(model, messages, options=options)
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _call)
+        return await self._run(_call)
+
+
+_ADAPTERS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_ADAPTERS_LOCK = threading.Lock()
+
+
+def get_ollama_async(ollama_client) -> OllamaAsyncAdapter:
+    """
+    Returns the adapter for this client, creating it on first use, so every
+    Second Brain worker and service shares the client's connection pool.
+    """
+    with _ADAPTERS_LOCK:
+        adapter = _ADAPTERS.get(ollama_client)
+        if adapter is None:
+            adapter = _ADAPTERS[ollama_client] = OllamaAsyncAdapter(ollama_client)
+        return adapter
 
 
 # Provide alias for backward compatibility
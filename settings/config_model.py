@@ -7,6 +7,7 @@ class OllamaConfig(BaseModel):
     embed_model: str = Field(default="mxbai-embed-large:latest", description="Name of the embedding model")
     timeout_seconds: float = Field(default=30.0, description="Request timeout in seconds")
     num_ctx: int = Field(default=16384, description="Context window size (tokens)")
+    max_parallel_requests: int = Field(default=1, ge=1, description="Concurrent requests sent to Ollama (1 serializes them; match OLLAMA_NUM_PARALLEL to overlap)")
 
 # QdrantConfig removed
 
@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Optional
+from typing import Iterable, List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from api.database import SessionLocal
 from api.models import Entry
@@ -13,19 +13,23 @@ class DBManager:
         # given the simple Architecture.
         pass
 
-    def add_entry(self, text: str, feature_type: str, tags: List[str] = None) -> str:
-        """Adds a new entry to the database."""
+    def add_entry(self, text: str, feature_type: str, tags: List[str] = None, meta: Dict[str, Any] = None) -> str:
+        """Adds a new entry to the database. `meta` holds non-searchable payload."""
         db: Session = SessionLocal()
         try:
             new_entry = Entry(
                 text=text,
                 feature_type=feature_type,
-                tags=tags or []
+                tags=tags or [],
+                meta=meta or {}
             )
             db.add(new_entry)
+            # id is generated client-side at flush; read it before commit expires
+            # the instance so we skip the refresh SELECT
+            db.flush()
+            entry_id = new_entry.id
             db.commit()
-            db.refresh(new_entry)
-            return new_entry.id
+            return entry_id
         finally:
             db.close()
 
@@ -38,6 +42,36 @@ class DBManager:
         finally:
             db.close()
 
+    def get_latest_entry(self, feature_type: str) -> Optional[Dict[str, Any]]:
+        """Most recent entry of the given feature type, or None."""
+        db: Session = SessionLocal()
+        try:
+            entry = (
+                db.query(Entry)
+                .filter(Entry.feature_type == feature_type)
+                .order_by(Entry.created_at.desc())
+                .first()
+            )
+            return self._to_dict(entry) if entry else None
+        finally:
+            db.close()
+
+    def get_feature_types(self, entry_ids: Iterable[str]) -> Dict[str, str]:
+        """Maps the given entry ids to their feature_type (unknown ids are omitted)."""
+        entry_ids = list(entry_ids)
+        if not entry_ids:
+            return {}
+        db: Session = SessionLocal()
+        try:
+            rows = (
+                db.query(Entry.id, Entry.feature_type)
+                .filter(Entry.id.in_(entry_ids))
+                .all()
+            )
+            return {entry_id: feature_type for entry_id, feature_type in rows}
+        finally:
+            db.close()
+
     def get_entry(self, entry_id: str) -> Optional[Dict[str, Any]]:
         db: Session = SessionLocal()
         try:
@@ -54,6 +88,7 @@ class DBManager:
             "text": entry.text,
             "feature_type": entry.feature_type,
             "tags": entry.tags,
+            "meta": entry.meta or {},
             "created_at": entry.created_at.isoformat() if entry.created_at else None,
             "updated_at": entry.updated_at.isoformat() if entry.updated_at else None,
             # Backwards compatibility fields for Orchestratror
@@ -1,15 +1,22 @@
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Any
+from typing import Callable, Iterable, List, Dict, Any
 import uuid
 import os
 from pathlib import Path
 
+# Max points sent to the vector store per upsert call
+UPSERT_BATCH_SIZE = 256
+
+# Marker written once chunks from before feature_type tagging have been backfilled
+FEATURE_TYPE_BACKFILL_MARKER = ".feature_type_backfilled"
+
 class MemoryLayer:
     def __init__(self, persistence_path: str = "./data/chroma", collection_name: str = "journal_entries", embedding_dim: int = 1024):
         # Ensure directory exists
         Path(persistence_path).mkdir(parents=True, exist_ok=True)
         
+        self.persistence_path = Path(persistence_path)
         self.client = chromadb.PersistentClient(path=persistence_path)
         self.collection_name = collection_name
         self.embedding_dim = embedding_dim
@@ -31,6 +38,7 @@ class MemoryLayer:
         """
         Upserts chunks with embeddings. 
         chunks should ideally have 'entry_id', 'text', 'metadata'.
+        Row-oriented convenience wrapper around upsert_columns.
         """
         ids = []
         documents = []
@@ -59,12 +67,29 @@ class MemoryLayer:
                      clean_meta[k] = str(v)
             metadatas.append(clean_meta)
 
-        if ids:
+        self.upsert_columns(ids, embeddings, documents, metadatas)
+
+    def upsert_columns(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        """
+        Upserts parallel columns as Chroma takes them, with no per-chunk
+        reshaping. Metadata values must already be primitives; text and id
+        need not be repeated there (search() fills them from the document/id).
+        Accepts chunks from many entries at once; they are written in
+        sub-batches of UPSERT_BATCH_SIZE.
+        """
+        for start in range(0, len(ids), UPSERT_BATCH_SIZE):
+            end = start + UPSERT_BATCH_SIZE
             self.collection.upsert(
-                ids=ids,
-                embeddings=embeddings,
-                documents=documents,
-                metadatas=metadatas
+                ids=ids[start:end],
+                embeddings=embeddings[start:end],
+                documents=documents[start:end],
+                metadatas=metadatas[start:end]
             )
 
     def search(self, query_vector: List[float], limit: int = 5, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
@@ -102,3 +127,50 @@ class MemoryLayer:
         self.collection.delete(
             where={"entry_id": entry_id}
         )
+
+    def backfill_feature_types(
+        self,
+        lookup: Callable[[Iterable[str]], Dict[str, str]],
+        batch_size: int = 500
+    ) -> int:
+        """
+        One-off: sets `feature_type` on chunks embedded before it was stored in
+        their metadata, so feature_type-filtered searches match them again.
+        lookup maps entry ids to their feature_type. Runs once per store
+        (a marker file records completion); returns the number of chunks updated.
+        """
+        marker = self.persistence_path / FEATURE_TYPE_BACKFILL_MARKER
+        if marker.exists():
+            return 0
+
+        updated = 0
+        offset = 0
+        while True:
+            page = self.collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+            ids = page["ids"]
+            if not ids:
+                break
+            offset += len(ids)
+
+            missing = [
+                (chunk_id, meta or {})
+                for chunk_id, meta in zip(ids, page["metadatas"])
+                if not (meta or {}).get("feature_type") and (meta or {}).get("entry_id")
+            ]
+            if not missing:
+                continue
+            feature_types = lookup({meta["entry_id"] for _, meta in missing})
+            fixed = [
+                (chunk_id, {**meta, "feature_type": feature_types[meta["entry_id"]]})
+                for chunk_id, meta in missing
+                if meta["entry_id"] in feature_types
+            ]
+            if fixed:
+                self.collection.update(
+                    ids=[chunk_id for chunk_id, _ in fixed],
+                    metadatas=[meta for _, meta in fixed]
+                )
+                updated += len(fixed)
+
+        marker.touch()
+        return updated
@@ -0,0 +1,77 @@
+import json
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+
+from connectors.ollama import OllamaClient
+from utils.errors import OllamaBadResponseError
+
+
+def _fake_stream(lines, status_code=200):
+    @contextmanager
+    def _stream(method, url, **kwargs):
+        resp = MagicMock()
+        resp.status_code = status_code
+        resp.iter_lines.return_value = iter(lines)
+        yield resp
+    return _stream
+
+
+def test_chat_stream_yields_tokens(monkeypatch):
+    lines = [
+        json.dumps({"message": {"content": "Hel"}, "done": False}),
+        "",
+        json.dumps({"message": {"content": "lo"}, "done": False}),
+        json.dumps({"message": {"content": ""}, "done": True}),
+    ]
+    client = OllamaClient()
+    monkeypatch.setattr(client._client, "stream", _fake_stream(lines))
+
+    tokens = list(client.chat_stream("model", [{"role": "user", "content": "hi"}]))
+
+    assert tokens == ["Hel", "lo"]
+    # The request slot is released once the stream is exhausted
+    assert client.lock.acquire(blocking=False)
+    client.lock.release()
+
+
+def test_embed_batch_single_request():
+    client = OllamaClient()
+    client._handle_request = MagicMock(return_value={"embeddings": [[0.1], [0.2]]})
+
+    vectors = client.embed_batch("embed-model", ["a", "b"])
+
+    assert vectors == [[0.1], [0.2]]
+    client._handle_request.assert_called_once_with(
+        "POST", "/api/embed", json={"model": "embed-model", "input": ["a", "b"]}
+    )
+
+
+def test_embed_batch_falls_back_without_api_embed():
+    client = OllamaClient(max_parallel=2)
+
+    def _request(method, endpoint, json=None):
+        if endpoint == "/api/embed":
+            raise OllamaBadResponseError("HTTP 404: Not Found")
+        return {"embedding": [float(len(json["prompt"]))]}
+
+    client._handle_request = MagicMock(side_effect=_request)
+
+    assert client.embed_batch("embed-model", ["a", "bb", "ccc"]) == [[1.0], [2.0], [3.0]]
+    # Later batches go straight to the per-text endpoint
+    client._handle_request.reset_mock()
+    assert client.embed_batch("embed-model", ["dddd"]) == [[4.0]]
+    client._handle_request.assert_called_once_with(
+        "POST", "/api/embeddings", json={"model": "embed-model", "prompt": "dddd"}
+    )
+
+
+def test_embed_reuses_cached_vector():
+    client = OllamaClient()
+    client._handle_request = MagicMock(return_value={"embedding": [0.5, 0.25]})
+
+    assert client.embed("embed-model", "same text") == [0.5, 0.25]
+    assert client.embed("embed-model", "same text") == [0.5, 0.25]
+    client._handle_request.assert_called_once()
+
+    client.embed("other-model", "same text")
+    assert client._handle_request.call_count == 2
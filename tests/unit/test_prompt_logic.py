@@ -34,3 +34,105 @@ def test_orchestrator_injects_safety_and_profile(mock_settings):
     assert "[PERSONALIZATION]" in sys_content
     assert "PROFILE_SIGNAL" in sys_content
     assert "SAFETY_BLOCK" in sys_content
+
+def test_format_hits_dedupes_by_entry_and_truncates():
+    """RAG hits are collapsed to one line per entry and capped in length."""
+    hits = [
+        {"entry_id": "a", "text": "First chunk of a."},
+        {"entry_id": "b", "text": "Sentence one. " + "x" * 500},
+        {"entry_id": "a", "text": "Second chunk of a."},
+    ]
+
+    text = Orchestrator._format_hits(hits, max_chars=100)
+    lines = text.split("\n")
+
+    assert lines[0] == "- First chunk of a."
+    assert len(lines) == 2
+    assert len(lines[1]) <= 102
+
+def test_chat_system_prompt_keeps_static_prefix():
+    """Per-turn context must come after the static head so the server can reuse its KV cache."""
+    import hashlib
+    from concurrent.futures import ThreadPoolExecutor
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+    from orchestrator.engine import CHAT_SYSTEM_PREFIX, RAG_JOURNAL_FILTER
+    from utils.safety import SafetyGuardrails
+
+    # Only the prompt-building pieces are needed, not the full service stack
+    orch = Orchestrator.__new__(Orchestrator)
+    orch._retrieval_pool = ThreadPoolExecutor(max_workers=2)
+    orch._prompt_profile = None
+    orch.safety = SafetyGuardrails()
+    orch.settings = SimpleNamespace(ollama=SimpleNamespace(num_ctx=4096))
+    orch.user_profile = "PROFILE_SIGNAL"
+    orch._get_second_brain_context = MagicMock(side_effect=["SB one", "SB two"])
+    orch._retrieve_context = MagicMock(side_effect=[
+        ([1.0], [{"entry_id": "a", "text": "First diary."}]),
+        ([0.5], [{"entry_id": "b", "text": "Second diary."}]),
+    ])
+
+    first, _ = orch._build_chat_messages("hello", [])
+    second, _ = orch._build_chat_messages("something else", [])
+    _, head = orch._prompt_heads()
+
+    digest = lambda s: hashlib.sha256(s.encode("utf-8")).hexdigest()
+    assert head.startswith(CHAT_SYSTEM_PREFIX)
+    assert digest(first[0]["content"][:len(head)]) == digest(second[0]["content"][:len(head)]) == digest(head)
+    assert "PROFILE_SIGNAL" in head
+    assert "SB one" not in head and "First diary." not in head
+    # Chat retrieves from the same journal entries as reflection and daily questions
+    assert orch._retrieve_context.call_args.args[2] == RAG_JOURNAL_FILTER
+
+def test_parse_summary_response_labels_and_fallback():
+    """Labels are matched case-insensitively, multi-line summaries are joined, unlabeled text falls back."""
+    from orchestrator.engine import parse_summary_response
+
+    assert parse_summary_response("Title: A quiet day\nSummary: I rested.") == {
+        "title": "A quiet day", "summary": "I rested."
+    }
+    assert parse_summary_response("TITLE: Walk Summary: Long walk.")["summary"] == "Long walk."
+    assert parse_summary_response("title: T\nsummary: line one\nline two")["summary"] == "line one line two"
+    assert parse_summary_response("First\nSecond\nThird") == {"title": "First", "summary": "Second Third"}
+    assert parse_summary_response("")["title"] == "Diary Entry"
+
+def test_parse_summary_response_markdown_and_midline_labels():
+    """Markdown-wrapped labels are stripped and "summary:" is found mid-line."""
+    from orchestrator.engine import parse_summary_response
+
+    assert parse_summary_response("Title: Park\nThe summary: I walked.")["summary"] == "I walked."
+    assert parse_summary_response("**Title:** Park\n**Summary:** I walked.") == {
+        "title": "Park", "summary": "I walked."
+    }
+    assert parse_summary_response("## Title: Learning C#\n- Summary: I walked.")["title"] == "Learning C#"
+
+def test_short_diary_session_skips_llm_summary():
+    """Sessions with too little user text are titled from the user's words without an LLM call."""
+    from unittest.mock import MagicMock
+
+    orch = Orchestrator.__new__(Orchestrator)
+    orch.ollama = MagicMock()
+    orch.process_new_entry = MagicMock(return_value="entry-1")
+
+    transcript = [
+        {"role": "assistant", "content": "How was your day?"},
+        {"role": "user", "content": "Went hiking with my sister and it felt great to be outside again."},
+    ]
+    assert orch.save_diary_session(transcript) == "entry-1"
+
+    orch.ollama.chat.assert_not_called()
+    saved = orch.process_new_entry.call_args.kwargs
+    assert saved["text"].startswith("Went hiking with my sister and it felt")
+    assert saved["payload_extras"] == {"transcript": transcript}
+
+def test_history_window_respects_token_budget():
+    """Chat history is packed newest-first into a third of num_ctx."""
+    from types import SimpleNamespace
+
+    orch = Orchestrator.__new__(Orchestrator)
+    orch.settings = SimpleNamespace(ollama=SimpleNamespace(num_ctx=300))  # 100 tokens -> 400 chars
+
+    history = [{"role": "user", "content": str(i) * 150} for i in range(4)]
+    kept = orch._history_window(history)
+
+    assert [m["content"][0] for m in kept] == ["2", "3"]
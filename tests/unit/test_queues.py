@@ -0,0 +1,35 @@
+import os
+from orchestrator.queues import JobQueue
+
+def test_peek_and_pop_batch(test_dir):
+    """Batch pop removes exactly the head jobs and keeps the rest in order."""
+    queue = JobQueue(os.path.join(test_dir, "jobs.jsonl"))
+    for i in range(5):
+        queue.push({"type": "embed", "n": i})
+
+    head = queue.peek_batch(3)
+    assert [j["n"] for j in head] == [0, 1, 2]
+
+    popped = queue.pop_batch(3)
+    assert [j["n"] for j in popped] == [0, 1, 2]
+    assert queue.peek()["n"] == 3
+    assert [j["n"] for j in queue.peek_batch(10)] == [3, 4]
+
+def test_pop_advances_head_and_survives_reopen(test_dir):
+    """Popped jobs stay consumed across instances; compaction keeps the tail intact."""
+    path = os.path.join(test_dir, "jobs.jsonl")
+    queue = JobQueue(path)
+    for i in range(10):
+        queue.push({"n": i})
+
+    assert queue.pop()["n"] == 0
+    assert queue.pop()["n"] == 1
+
+    reopened = JobQueue(path)
+    assert reopened.peek()["n"] == 2
+
+    # Consuming more than half the log triggers compaction
+    assert [j["n"] for j in reopened.pop_batch(5)] == [2, 3, 4, 5, 6]
+    reopened.push({"n": 10})
+    assert [j["n"] for j in JobQueue(path).peek_batch(10)] == [7, 8, 9, 10]
+    assert reopened.pop_batch(10) and reopened.pop() is None
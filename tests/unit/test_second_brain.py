@@ -2,6 +2,7 @@
 Unit tests for Second Brain: tagging, linking, embedding, retrieval.
 """
 
+import asyncio
 import pytest
 import json
 from unittest.mock import Mock, AsyncMock, MagicMock
@@ -13,6 +14,7 @@ from second_brain import (
     EmbeddingManager,
     SecondBrainRetriever,
     SecondBrainService,
+    CandidateMatrix,
     ItemLinkData,
     RelatedItem
 )
@@ -98,6 +100,15 @@ class TestTagGenerator:
         assert len(tags) == 3
         assert mock_ollama.generate.call_count == 2
 
+    def test_retry_delay_is_jittered_and_capped(self):
+        from second_brain import _retry_delay, RETRY_BASE_SECONDS, RETRY_MAX_SECONDS
+
+        for attempt in range(6):
+            ceiling = min(RETRY_BASE_SECONDS * 2 ** attempt, RETRY_MAX_SECONDS)
+            delays = [_retry_delay(attempt) for _ in range(50)]
+            assert all(0.5 * ceiling <= d <= 1.5 * ceiling for d in delays)
+            assert len(set(delays)) > 1
+
     @pytest.mark.asyncio
     async def test_generate_tags_fallback(self, mock_ollama):
         mock_ollama.generate.return_value = {"response": "invalid json"}
@@ -111,6 +122,16 @@ class TestTagGenerator:
         assert tags[1].category == "intent"
         assert tags[2].category == "emotion"
 
+    def test_fallback_tags_keyword_priority(self):
+        generator = TagGenerator(Mock())
+
+        # Earlier rules win regardless of where the keyword appears
+        tags = generator._fallback_tags("Dreaming of a new job, I'm grateful but worried. What should I do?")
+        assert [t.tag for t in tags] == ["work", "seeking guidance", "anxiety"]
+
+        tags = generator._fallback_tags("Nothing in particular")
+        assert [t.tag for t in tags] == ["personal reflection", "processing thoughts", "contemplation"]
+
 
 # =============================================================================
 # TEST: Embeddings
@@ -146,6 +167,77 @@ class TestEmbeddingManager:
 
         assert embedding is None
 
+    @pytest.mark.asyncio
+    async def test_generate_embedding_coalesces_concurrent_calls(self, mock_ollama):
+        mock_ollama.embeddings_batch = AsyncMock(return_value={
+            "embeddings": [[0.1], [0.2], [0.3]]
+        })
+
+        manager = EmbeddingManager(mock_ollama)
+        embeddings = await asyncio.gather(*(manager.generate_embedding(t) for t in ["a", "b", "c"]))
+
+        assert embeddings == [[0.1], [0.2], [0.3]]
+        mock_ollama.embeddings_batch.assert_called_once()
+        mock_ollama.embeddings.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_embed_query_cached_across_instances(self, mock_ollama):
+        mock_ollama.embeddings = AsyncMock(return_value={"embedding": [3.0, 4.0]})
+
+        first = await EmbeddingManager(mock_ollama, "test-query-model").embed_query("how was my week")
+        second = await EmbeddingManager(mock_ollama, "test-query-model").embed_query("how was my week")
+
+        assert first.tolist() == pytest.approx([0.6, 0.8])
+        assert second is first
+        mock_ollama.embeddings.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_embed_queries_share_one_request(self, mock_ollama):
+        mock_ollama.embeddings = AsyncMock(return_value={"embedding": [3.0, 4.0]})
+        mock_ollama.embeddings_batch = AsyncMock(return_value={
+            "embeddings": [[1.0, 0.0], [0.0, 2.0]]
+        })
+
+        manager = EmbeddingManager(mock_ollama, "test-batch-query-model")
+        first, second, third, again = await asyncio.gather(
+            manager.embed_query("morning run"),
+            manager.embed_query("late night call"),
+            manager.embed_query("weekend plans"),
+            manager.embed_query("late night call"),
+        )
+
+        # The first query goes out alone; the ones arriving while it is in
+        # flight share one batch request, and the duplicate shares its task
+        assert first.tolist() == pytest.approx([0.6, 0.8])
+        assert second.tolist() == [1.0, 0.0]
+        assert third.tolist() == [0.0, 1.0]
+        assert again is second
+        mock_ollama.embeddings.assert_called_once()
+        mock_ollama.embeddings_batch.assert_called_once()
+        assert mock_ollama.embeddings_batch.call_args.kwargs["prompts"] == ["late night call", "weekend plans"]
+
+    @pytest.mark.asyncio
+    async def test_generate_embeddings_single_request(self, mock_ollama):
+        mock_ollama.embeddings_batch = AsyncMock(return_value={
+            "embeddings": [[0.1, 0.2], [0.3, 0.4]]
+        })
+
+        manager = EmbeddingManager(mock_ollama, "mxbai-embed-large")
+        embeddings = await manager.generate_embeddings(["first", "second"])
+
+        assert embeddings == [[0.1, 0.2], [0.3, 0.4]]
+        mock_ollama.embeddings_batch.assert_called_once()
+        mock_ollama.embeddings.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_generate_embeddings_none_on_failure(self, mock_ollama):
+        mock_ollama.embeddings_batch = AsyncMock(side_effect=Exception("Ollama down"))
+
+        manager = EmbeddingManager(mock_ollama)
+        embeddings = await manager.generate_embeddings(["first", "second"])
+
+        assert embeddings == [None, None]
+
     def test_cosine_similarity_identical(self):
         vec = [1.0, 0.0, 0.0]
         result = EmbeddingManager.cosine_similarity(vec, vec)
@@ -169,6 +261,71 @@ class TestEmbeddingManager:
         result = EmbeddingManager.cosine_similarity(vec1, vec2)
         assert result == 0.0
 
+    def test_cosine_similarities_batch(self):
+        query = [1.0, 0.5, 0.3]
+        vectors = [[1.0, 0.5, 0.3], [0.0, 0.0, 0.0], [0.9, 0.4, 0.2]]
+        sims = EmbeddingManager.cosine_similarities(query, vectors)
+
+        assert len(sims) == 3
+        assert sims[0] == pytest.approx(1.0, abs=1e-6)
+        assert sims[1] == 0.0  # Zero vector scores 0, no NaN
+        assert sims[2] == pytest.approx(EmbeddingManager.cosine_similarity(query, vectors[2]), abs=1e-6)
+
+    def test_pack_unpack_roundtrip(self):
+        blob, norm = EmbeddingManager.pack([3.0, 4.0])
+        assert norm == pytest.approx(5.0)
+
+        vec, stored_norm = EmbeddingManager.unpack(blob, None, norm)
+        assert list(vec) == [3.0, 4.0]
+        assert stored_norm == norm
+
+        # Legacy rows only have the JSON payload
+        vec, legacy_norm = EmbeddingManager.unpack(None, json.dumps([3.0, 4.0]))
+        assert list(vec) == [3.0, 4.0]
+        assert legacy_norm == pytest.approx(5.0)
+        assert EmbeddingManager.unpack(None, "not json") == (None, None)
+
+    def test_pack_int8_roundtrip(self):
+        blob, scale, norm = EmbeddingManager.pack_int8([3.0, -4.0, 0.5])
+        assert len(blob) == 3
+        assert norm == pytest.approx((3.0**2 + 4.0**2 + 0.5**2) ** 0.5)
+
+        vec, stored_norm = EmbeddingManager.unpack(blob, None, norm, scale)
+        assert vec.tolist() == pytest.approx([3.0, -4.0, 0.5], abs=scale)
+        assert stored_norm == norm
+
+    def test_backfill_embedding_blobs(self):
+        from sqlalchemy import create_engine, select
+        from api.database import Base, backfill_embedding_blobs
+        from api.models import ItemEmbedding
+
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        table = ItemEmbedding.__table__
+        with engine.begin() as conn:
+            conn.execute(table.insert(), [
+                {"id": "e1", "item_id": "a", "embedding_json": json.dumps([3.0, 4.0]), "embedding_model": "m", "embedding_dim": 2},
+                {"id": "e2", "item_id": "b", "embedding_json": "not json", "embedding_model": "m", "embedding_dim": 2},
+            ])
+
+        assert backfill_embedding_blobs(engine) == 1
+        assert backfill_embedding_blobs(engine) == 0
+        with engine.connect() as conn:
+            rows = dict(conn.execute(select(table.c.id, table.c.embedding_blob)).all())
+        assert EmbeddingManager.unpack(rows["e1"], None)[0].tolist() == [3.0, 4.0]
+        assert rows["e2"] is None
+
+    def test_quantize_int8(self):
+        import numpy as np
+
+        vectors = np.array([[0.6, -0.8, 0.0], [0.0, 0.0, 0.0]], dtype=np.float32)
+        q8, scales = EmbeddingManager.quantize(vectors)
+
+        assert q8.dtype == np.int8
+        assert q8[0].tolist() == [95, -127, 0]
+        assert scales[1] == 0.0
+        assert np.allclose(q8 * scales[:, None], vectors, atol=scales[0])
+
 
 # =============================================================================
 # TEST: Second Brain Service
@@ -179,11 +336,10 @@ class TestSecondBrainServiceIntegration:
 
     @pytest.fixture
     def mock_session(self):
-        """Mock SQLAlchemy session."""
-        session = Mock()
-        session.query.return_value = Mock()
-        session.query.return_value.filter.return_value = Mock()
+        """Mock SQLAlchemy session (query chains iterate as empty)."""
+        session = MagicMock()
         session.query.return_value.filter.return_value.first.return_value = None
+        session.execute.return_value.all.return_value = []
         return session
 
     @pytest.fixture
@@ -209,8 +365,99 @@ class TestSecondBrainServiceIntegration:
 
         assert result["tags_created"] == 3
         assert result["embedding_updated"] is True
-        assert mock_session.add.call_count >= 3  # Tags added
+        assert result["errors"] == []
+        mock_session.commit.assert_called_once()  # One transaction per item
+        # Tags are upserted in one statement rather than added one by one
+        tag_inserts = [
+            call for call in mock_session.execute.call_args_list
+            if str(call.args[0]).startswith("INSERT INTO tags")
+        ]
+        assert len(tag_inserts) == 1
+        assert [row["name"] for row in tag_inserts[0].args[1]] == ["health", "goal setting", "optimism"]
+
+    @pytest.mark.asyncio
+    async def test_near_duplicate_item_reuses_tags(self, mock_session, mock_ollama):
+        service = SecondBrainService(mock_session, mock_ollama, embed_model="test-dedup-model")
+
+        await service.process_new_item("entry-1", "Went for a run, feeling good", skip_linking=True)
+        result = await service.process_new_item("entry-2", "Went for a run, feeling great", skip_linking=True)
+
+        assert result["tags_created"] == 3
+        mock_ollama.generate.assert_called_once()  # Second item hit the tag cache
 
+    @pytest.mark.asyncio
+    async def test_fallback_tags_are_not_cached(self, mock_session, mock_ollama, monkeypatch):
+        monkeypatch.setattr("second_brain._retry_delay", lambda attempt: 0)
+        mock_ollama.generate = AsyncMock(return_value={"response": "not json"})
+        service = SecondBrainService(mock_session, mock_ollama, embed_model="test-fallback-model")
+
+        first = await service.process_new_item("entry-1", "Went for a run, feeling good", skip_linking=True)
+        calls = mock_ollama.generate.call_count
+        await service.process_new_item("entry-2", "Went for a run, feeling great", skip_linking=True)
+
+        assert first["tags_created"] == 3  # Keyword fallbacks
+        assert mock_ollama.generate.call_count == 2 * calls  # Near-duplicate asked the LLM again
+
+    @pytest.mark.asyncio
+    async def test_reprocess_skips_unchanged_content(self, mock_ollama):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from api.database import Base
+        from api.models import Entry
+
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        db.add(Entry(id="entry-1", text="Morning run by the river", feature_type="journal"))
+        db.commit()
+        service = SecondBrainService(db, mock_ollama, embed_model="test-reprocess-model")
+
+        await service.process_new_item("entry-1", "Morning run by the river")
+        calls = mock_ollama.embeddings.call_count
+        result = await service.reprocess_item("entry-1")
+        assert result["unchanged"] is True
+        assert mock_ollama.embeddings.call_count == calls
+
+        db.query(Entry).filter(Entry.id == "entry-1").update({"text": "Evening run instead"})
+        db.commit()
+        result = await service.reprocess_item("entry-1")
+        assert "unchanged" not in result
+        assert result["embedding_updated"] is True
+
+    @pytest.mark.asyncio
+    async def test_cold_cache_overlaps_tags_and_embedding(self, mock_session, mock_ollama):
+        service = SecondBrainService(mock_session, mock_ollama, embed_model="test-overlap-model")
+        tags_started = []
+
+        async def embeddings(**kwargs):
+            tags_started.append(mock_ollama.generate.await_count)
+            return {"embedding": [0.1] * 1024}
+
+        mock_ollama.embeddings = AsyncMock(side_effect=embeddings)
+        result = await service.process_new_item("entry-1", "First entry", skip_linking=True)
+
+        assert result["tags_created"] == 3
+        assert tags_started == [1]  # Tag prompt was already in flight
+
+
+    def test_tag_cache_predicts_misses_from_recent_lookups(self):
+        import numpy as np
+        from second_brain import TagCentroidCache
+
+        cache = TagCentroidCache(maxlen=8)
+        assert cache.likely_miss()  # Empty
+
+        tags = [GeneratedTag(tag="running", category="topic")]
+        cache.add(np.array([1.0, 0.0], dtype=np.float32), tags)
+        assert not cache.likely_miss()  # Too few lookups to judge
+
+        for _ in range(TagCentroidCache.HIT_RATE_MIN_SAMPLES):
+            assert cache.lookup(np.array([0.0, 1.0], dtype=np.float32)) is None
+        assert cache.likely_miss()
+
+        for _ in range(TagCentroidCache.HIT_RATE_MIN_SAMPLES):
+            assert cache.lookup(np.array([1.0, 0.0], dtype=np.float32)) == tags
+        assert not cache.likely_miss()
 
 # =============================================================================
 # TEST: Retrieval
@@ -228,6 +475,8 @@ class TestSecondBrainRetrieval:
         session.query.return_value = query
         query.join.return_value = query
         query.filter.return_value = query
+        query.group_by.return_value = query
+        query.order_by.return_value = query
         query.all.return_value = []
         query.first.return_value = None
 
@@ -259,6 +508,29 @@ class TestSecondBrainRetrieval:
         assert "themes" in context
         assert context["summary"] == ""
 
+    @pytest.mark.asyncio
+    async def test_query_embed_sent_before_db_strategies(self, mock_session, mock_ollama):
+        events = []
+
+        async def embeddings(model, prompt):
+            events.append("embed")
+            return {"embedding": [0.5] * 384}
+
+        mock_ollama.embeddings = AsyncMock(side_effect=embeddings)
+        manager = EmbeddingManager(mock_ollama, "test-overlap-model")
+        retriever = SecondBrainRetriever(mock_session, manager)
+
+        def keyword_matches(query_text, current_item_id):
+            events.append("db")
+            return []
+
+        retriever._get_keyword_matches = keyword_matches
+        retriever._get_semantic_matches = AsyncMock(return_value=[])
+
+        await retriever.get_context(query_text="an uncached query", top_k=5, token_budget=500)
+
+        assert events == ["embed", "db"]
+
     def test_deduplicate_and_score(self, mock_session):
         """Test deduplication of related items by ID."""
         manager = EmbeddingManager(Mock())
@@ -276,6 +548,68 @@ class TestSecondBrainRetrieval:
         assert result[0].relevance_score == 0.95  # Higher score kept
         assert result[0].connection_type == "both"  # Both types marked
 
+    def test_related_item_is_frozen(self):
+        """Result dataclasses are immutable and slotted."""
+        item = RelatedItem("id-1", "note", "content", 0.9, "tag_match", ("work",), "")
+
+        with pytest.raises(AttributeError):
+            item.relevance_score = 0.1
+        assert not hasattr(item, "__dict__")
+        assert hash(item) == hash(RelatedItem("id-1", "note", "content", 0.9, "tag_match", ("work",), ""))
+
+    def test_shared_tags_are_interned(self):
+        """Identical tag sets share one sorted tuple regardless of order."""
+        from second_brain import _intern_tags
+
+        a = _intern_tags(["work", "stress"])
+        b = _intern_tags(["stress", "work"])
+        assert a == ("stress", "work")
+        assert a is b
+        assert _intern_tags([]) == ()
+
+    def test_candidate_matrix_tracks_table(self):
+        """Matrix picks up appended rows and rebuilds after in-place updates."""
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from api.database import Base
+        from api.models import Entry
+
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        service = SecondBrainService(db, Mock())
+
+        for item_id, vec in [("a", [1.0, 0.0]), ("b", [0.0, 1.0])]:
+            db.add(Entry(id=item_id, text=item_id, feature_type="journal"))
+            service._store_embedding(item_id, vec)
+
+        matrix = CandidateMatrix.for_session(db)
+        matrix.refresh(db)
+        assert [i for i, _ in matrix.ranked([1.0, 0.1], threshold=0.5)] == ["a"]
+
+        db.add(Entry(id="c", text="c", feature_type="journal"))
+        service._store_embedding("c", [1.0, 0.2])
+        service._store_embedding("a", [0.0, 1.0])
+        matrix.refresh(db)
+        assert [i for i, _ in matrix.ranked([1.0, 0.1], threshold=0.5)] == ["c"]
+
+    def test_candidate_matrix_ivf_finds_nearest(self):
+        """Past the IVF threshold, the probed lists still contain the nearest row."""
+        import numpy as np
+
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(400, 16)).astype(np.float32)
+        matrix = CandidateMatrix()
+        matrix.IVF_MIN_ROWS = 100
+        matrix._append([
+            (f"id-{i}", i + 1, v.astype('<f4').tobytes(), None, float(np.linalg.norm(v)))
+            for i, v in enumerate(vectors)
+        ])
+
+        assert 16 in matrix._ivf
+        top = matrix.ranked(vectors[123], threshold=0.0, limit=1)
+        assert top[0][0] == "id-123"
+
     def test_create_context_summary_token_budget(self, mock_session):
         """Test token budget enforcement in summaries."""
         manager = EmbeddingManager(Mock())
@@ -381,6 +715,103 @@ class TestBackgroundProcessor:
         assert job_data["content"] == "test content"
         assert job_data["item_type"] == "note"
 
+    def test_circuit_breaker_opens_and_recovers(self, monkeypatch):
+        from second_brain import ollama_adapter
+        from second_brain.ollama_adapter import OllamaCircuitBreaker
+
+        now = [100.0]
+        monkeypatch.setattr(ollama_adapter.time, "monotonic", lambda: now[0])
+        breaker = OllamaCircuitBreaker(threshold=2, cooldown=30)
+
+        breaker.record_failure()
+        assert not breaker.is_open()
+        breaker.record_failure()
+        assert breaker.is_open()
+
+        now[0] += 31  # Half-open: calls go through, one failure re-opens
+        assert not breaker.is_open()
+        breaker.record_failure()
+        assert breaker.is_open()
+
+        now[0] += 31
+        breaker.record_success()
+        breaker.record_failure()
+        assert not breaker.is_open()
+
+    @pytest.mark.asyncio
+    async def test_get_context_sync_from_running_loop(self, monkeypatch):
+        from second_brain.background_processor import SecondBrainContextInjector
+
+        calls = []
+
+        async def get_context_for_prompt(self, query_text, token_budget=500, **kwargs):
+            calls.append(query_text)
+            self._cache.set(query_text, token_budget, "from the background loop")
+            return {"summary": "from the background loop", "cached": False}
+
+        monkeypatch.setattr(SecondBrainContextInjector, "get_context_for_prompt", get_context_for_prompt)
+        injector = SecondBrainContextInjector(Mock(), "test-embed-model")
+
+        # Called from inside a running loop: must not wait on this loop
+        first = injector.get_context_sync("what did I do today")
+        second = injector.get_context_sync("what did I do today")
+
+        assert first["summary"] == "from the background loop"
+        assert second["cached"] is True
+        assert calls == ["what did I do today"]
+        injector.shutdown()
+
+    def test_context_cache_gives_read_entries_second_chance(self):
+        from second_brain.background_processor import ContextCache
+
+        cache = ContextCache(maxsize=2, shards=1)
+        cache.set("a", 100, "A")
+        cache.set("b", 100, "B")
+        assert cache.get("a", 100) == "A"  # Sets "a"'s reference bit
+
+        cache.set("c", 100, "C")
+        assert cache.get("b", 100) is None
+        assert cache.get("a", 100) == "A"
+        assert cache.get("c", 100) == "C"
+        assert cache.get("a", 200) is None  # Budget is part of the key
+
+        expired = ContextCache(maxsize=2, ttl_seconds=0, shards=1)
+        expired.set("a", 100, "A")
+        assert expired.get("a", 100) is None
+
+    def test_sharded_context_cache_bounds_size(self):
+        from second_brain.background_processor import ContextCache
+
+        cache = ContextCache(maxsize=32, shards=4)
+        for i in range(200):
+            cache.set(f"query {i}", 100, str(i))
+
+        assert 0 < cache.size() <= 32
+        assert cache.get("query 199", 100) == "199"
+        cache.clear()
+        assert cache.size() == 0
+
+    @pytest.mark.asyncio
+    async def test_batch_process_bounded_concurrency(self, monkeypatch):
+        from second_brain import SecondBrainBackgroundProcessor
+
+        running, peak = 0, 0
+
+        async def reprocess_item(self, item_id):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return {"item_id": item_id}
+
+        monkeypatch.setattr(SecondBrainService, "reprocess_item", reprocess_item)
+        processor = SecondBrainBackgroundProcessor(Mock, Mock())
+        results = await processor.batch_process([f"item-{i}" for i in range(6)], concurrency=2)
+
+        assert [r["item_id"] for r in results] == [f"item-{i}" for i in range(6)]
+        assert peak == 2
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
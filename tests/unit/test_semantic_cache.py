@@ -0,0 +1,29 @@
+from orchestrator.semantic_cache import SemanticCache
+
+def test_exact_and_semantic_hits():
+    """Exact prompt hash hits, near-duplicate vectors hit, other scopes never do."""
+    cache = SemanticCache(maxlen=4, threshold=0.92)
+    key = SemanticCache.make_key("system", "user")
+    cache.insert(key, [1.0, 0.0, 0.0], "scope-a", "cached reply")
+
+    assert cache.get_exact(key) == "cached reply"
+    assert cache.get_exact(SemanticCache.make_key("system", "other")) is None
+    assert cache.lookup([0.99, 0.05, 0.0], "scope-a") == "cached reply"
+    assert cache.lookup([0.0, 1.0, 0.0], "scope-a") is None
+    assert cache.lookup([1.0, 0.0, 0.0], "scope-b") is None
+
+def test_fifo_eviction_and_expiry():
+    """Oldest entries are evicted first; expired entries are ignored."""
+    cache = SemanticCache(maxlen=2, threshold=0.92)
+    cache.insert("k1", [1.0, 0.0], "s", "first")
+    cache.insert("k2", [0.0, 1.0], "s", "second")
+    cache.insert("k3", [-1.0, 0.0], "s", "third")
+
+    assert cache.get_exact("k1") is None
+    assert cache.lookup([1.0, 0.0], "s") is None
+    assert cache.lookup([0.0, 1.0], "s") == "second"
+
+    expired = SemanticCache(ttl_seconds=-1)
+    expired.insert("k", [1.0, 0.0], "s", "old")
+    assert expired.get_exact("k") is None
+    assert expired.lookup([1.0, 0.0], "s") is None
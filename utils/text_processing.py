@@ -1,6 +1,70 @@
+import hashlib
+import os
 import re
+from functools import lru_cache
 from typing import List
 
+# Fallback estimate when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+# tiktoken caches the BPE file under the SHA-1 of its download URL
+_CL100K_URL = "https://openaipublic.blob.core.windows.net/encodings/cl100k_base.tiktoken"
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """
+    tiktoken's cl100k encoding, only if its BPE file is already in
+    TIKTOKEN_CACHE_DIR. Never downloads it: no network calls at runtime.
+    Loaded on first use rather than at import.
+    """
+    cache_dir = os.environ.get("TIKTOKEN_CACHE_DIR")
+    if not cache_dir:
+        return None
+    cache_key = hashlib.sha1(_CL100K_URL.encode()).hexdigest()
+    if not os.path.isfile(os.path.join(cache_dir, cache_key)):
+        return None
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """
+    Approximate token count for prompt budgeting: cl100k BPE when a local
+    copy is available (close to, but not, the Ollama models' tokenizers),
+    otherwise ~4 chars per token.
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(text) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cuts text to at most max_tokens (same counting as count_tokens), backing
+    off to the last full sentence. Text within budget is returned unchanged.
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        ids = encoding.encode(text)
+        if len(ids) <= max_tokens:
+            return text
+        head = encoding.decode(ids[:max_tokens])
+        end = len(head)
+    else:
+        end = max_tokens * CHARS_PER_TOKEN
+        if len(text) <= end:
+            return text
+        head = text
+    # rfind bounds the scan to the kept prefix, so the head is only copied once
+    cut = head.rfind('.', 0, end)
+    return (head[:cut] if cut != -1 else head[:end]) + '.'
+
 def chunk_text(text: str, max_chars: int = 1000, overlap: int = 100) -> List[str]:
     """
     Chunks text strictly by character limit to respect Embedding context windows (usually 512 tokens ~ 2000 chars).